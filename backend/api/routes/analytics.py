@@ -0,0 +1,472 @@
+"""
+Analytics endpoints for usage and system metrics.
+"""
+import asyncio
+import hashlib
+import json
+import logging
+import time
+from collections.abc import Mapping
+from functools import lru_cache
+from typing import Optional
+import psutil
+from fastapi import APIRouter, Depends, Request, Response
+from sqlalchemy import text, select, func
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from core.database import get_db, AsyncSessionLocal, engine
+from core.models import Profile
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter()
+
+
+@lru_cache(maxsize=1)
+def _format_iso(epoch_second: int) -> str:
+    return time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime(epoch_second))
+
+
+def _now_iso() -> str:
+    """Current UTC time in ISO-8601 at second resolution.
+
+    strftime over gmtime is C-level and the result is memoized per
+    second, so at high request rates the timestamp is almost free.
+    """
+    return _format_iso(int(time.time()))
+
+
+# How often the usage rollup view is refreshed (seconds)
+ROLLUP_REFRESH_INTERVAL = 900
+
+_rollup_refresher: Optional[asyncio.Task] = None
+
+# Fallback query scanning chat_messages directly, used when the rollup
+# view does not exist (e.g. a database created before it was added).
+_USAGE_FALLBACK_SQL = text(
+    "SELECT "
+    "count(*) FILTER (WHERE timestamp >= now() - interval '1 day') AS daily, "
+    "count(*) FILTER (WHERE timestamp >= now() - interval '7 days') AS weekly, "
+    "count(*) FILTER (WHERE timestamp >= now() - interval '30 days') AS monthly "
+    "FROM chat_messages "
+    "WHERE role = 'user' AND timestamp >= now() - interval '30 days'"
+)
+
+_USAGE_ROLLUP_SQL = text(
+    "SELECT "
+    "COALESCE(sum(c) FILTER (WHERE d >= now() - interval '1 day'), 0) AS daily, "
+    "COALESCE(sum(c) FILTER (WHERE d >= now() - interval '7 days'), 0) AS weekly, "
+    "COALESCE(sum(c), 0) AS monthly "
+    "FROM mv_user_messages_daily "
+    "WHERE d >= now() - interval '30 days'"
+)
+
+
+# "Popular models" changes rarely, so the grouped result is cached
+# briefly in-process
+POPULAR_MODELS_TTL = 60.0
+
+_popular_models_cache = {"ts": 0.0, "value": None}
+
+# Single labeled count expression shared by SELECT and ORDER BY, with a
+# LIMIT so only the top entries are sorted server-side
+_popular_models_count = func.count(Profile.id).label("count")
+_POPULAR_MODELS_SQL = (
+    select(Profile.provider, Profile.model, _popular_models_count)
+    .group_by(Profile.provider, Profile.model)
+    .order_by(_popular_models_count.desc())
+    .limit(5)
+)
+
+
+async def _get_popular_models(db: AsyncSession) -> list:
+    """Get the most-used provider/model combinations (cached)."""
+    now = time.monotonic()
+    if (
+        _popular_models_cache["value"] is not None
+        and now - _popular_models_cache["ts"] < POPULAR_MODELS_TTL
+    ):
+        return _popular_models_cache["value"]
+
+    result = await db.execute(_POPULAR_MODELS_SQL)
+    value = [
+        {"provider": provider, "model": model, "count": count}
+        for provider, model, count in result
+    ]
+    _popular_models_cache["value"] = value
+    _popular_models_cache["ts"] = now
+    return value
+
+
+# The three documents counters are folded into one FILTER aggregate so
+# the table is scanned once instead of three times
+_DB_METRICS_EXACT_SQL = text(
+    "SELECT "
+    "(SELECT count(*) FROM profiles) AS total_profiles, "
+    "d.total AS total_documents, "
+    "d.processed AS processed_documents, "
+    "d.unprocessed AS unprocessed_documents, "
+    "(SELECT count(*) FROM document_chunks) AS total_chunks, "
+    "(SELECT count(*) FROM chat_sessions) AS total_sessions, "
+    "(SELECT count(*) FROM chat_messages) AS total_messages "
+    "FROM (SELECT count(*) AS total, "
+    "count(*) FILTER (WHERE processed) AS processed, "
+    "count(*) FILTER (WHERE NOT processed) AS unprocessed "
+    "FROM documents) d"
+)
+
+# Same shape, but the two large tables use the planner's reltuples
+# estimate instead of scanning every tuple. reltuples is -1 until the
+# table has been vacuumed/analyzed, in which case we fall back to an
+# exact count for that table.
+_DB_METRICS_ESTIMATED_SQL = text(
+    "SELECT "
+    "(SELECT count(*) FROM profiles) AS total_profiles, "
+    "d.total AS total_documents, "
+    "d.processed AS processed_documents, "
+    "d.unprocessed AS unprocessed_documents, "
+    "(SELECT CASE WHEN c.reltuples < 0 THEN (SELECT count(*) FROM document_chunks) "
+    "ELSE c.reltuples::bigint END FROM pg_class c "
+    "WHERE c.oid = to_regclass('document_chunks')) AS total_chunks, "
+    "(SELECT count(*) FROM chat_sessions) AS total_sessions, "
+    "(SELECT CASE WHEN c.reltuples < 0 THEN (SELECT count(*) FROM chat_messages) "
+    "ELSE c.reltuples::bigint END FROM pg_class c "
+    "WHERE c.oid = to_regclass('chat_messages')) AS total_messages "
+    "FROM (SELECT count(*) AS total, "
+    "count(*) FILTER (WHERE processed) AS processed, "
+    "count(*) FILTER (WHERE NOT processed) AS unprocessed "
+    "FROM documents) d"
+)
+
+
+# Catalog statistics only change after ANALYZE, so closely spaced
+# requests can share one snapshot
+PERFORMANCE_CACHE_TTL = 30.0
+
+_performance_cache = {"ts": 0.0, "value": None}
+
+_TABLE_STATS_SQL = text(
+    'SELECT relname AS "table", n_live_tup AS live_rows, '
+    "n_dead_tup AS dead_rows, seq_scan AS seq_scans, "
+    "idx_scan AS index_scans "
+    "FROM pg_stat_user_tables "
+    "ORDER BY n_live_tup DESC"
+)
+
+_PROCESSING_STATS_SQL = text(
+    "SELECT "
+    "count(*) FILTER (WHERE processed) AS processed_count, "
+    "count(*) FILTER (WHERE NOT processed) AS pending_count, "
+    "EXTRACT(EPOCH FROM avg(now() - upload_date)) AS avg_age_seconds "
+    "FROM documents"
+)
+
+
+async def _refresh_rollup_loop():
+    """Periodically refresh the daily user-message rollup view."""
+    while True:
+        await asyncio.sleep(ROLLUP_REFRESH_INTERVAL)
+        try:
+            # REFRESH ... CONCURRENTLY refuses to run inside a
+            # transaction block, so it needs an autocommit connection
+            # rather than a session (which autobegins one)
+            async with engine.connect() as conn:
+                await conn.execution_options(isolation_level="AUTOCOMMIT")
+                await conn.execute(text(
+                    "REFRESH MATERIALIZED VIEW CONCURRENTLY mv_user_messages_daily"
+                ))
+        except Exception as e:
+            logger.warning(f"Failed to refresh usage rollup view: {e}")
+
+
+# Cached psutil sample; sampling blocks, so it is done at most once per TTL
+SYSTEM_METRICS_TTL = 5.0
+
+# Memory and disk figures move slowly; refresh them from a background
+# sampler instead of issuing the syscalls per request
+SLOW_METRICS_INTERVAL = 30.0
+
+# Boot time never changes within a process lifetime
+_BOOT_TIME = psutil.boot_time()
+
+_system_metrics_cache = {"ts": 0.0, "value": None}
+_slow_metrics_cache = {"memory": None, "disk": None}
+_slow_metrics_sampler: Optional[asyncio.Task] = None
+
+
+def _sample_slow_metrics():
+    """Refresh the cached memory and disk snapshots."""
+    _slow_metrics_cache["memory"] = psutil.virtual_memory()
+    _slow_metrics_cache["disk"] = psutil.disk_usage('/')
+
+
+async def _slow_metrics_loop():
+    """Periodically refresh the slow-moving system samples."""
+    while True:
+        await asyncio.sleep(SLOW_METRICS_INTERVAL)
+        try:
+            _sample_slow_metrics()
+        except Exception as e:
+            logger.warning(f"Failed to sample system metrics: {e}")
+
+
+def prime_system_metrics():
+    """Prime psutil sampling and start the background refresher."""
+    global _slow_metrics_sampler
+
+    psutil.cpu_percent(interval=None)
+    _sample_slow_metrics()
+
+    if _slow_metrics_sampler is None or _slow_metrics_sampler.done():
+        _slow_metrics_sampler = asyncio.create_task(_slow_metrics_loop())
+
+
+def _sample_system_metrics() -> dict:
+    """Build a system usage snapshot from the cached samples."""
+    memory = _slow_metrics_cache["memory"] or psutil.virtual_memory()
+    disk = _slow_metrics_cache["disk"] or psutil.disk_usage('/')
+
+    return {
+        # Non-blocking: returns usage since the previous call instead of
+        # sleeping for a sampling interval
+        "cpu_percent": psutil.cpu_percent(interval=None),
+        "memory_percent": memory.percent,
+        "memory_used": memory.used,
+        "memory_total": memory.total,
+        "disk_percent": disk.percent,
+        "disk_used": disk.used,
+        "disk_total": disk.total,
+        "boot_time": _BOOT_TIME,
+        "uptime": time.time() - _BOOT_TIME
+    }
+
+
+def _ensure_rollup_refresher():
+    """Start the rollup refresher task if it is not already running."""
+    global _rollup_refresher
+    if _rollup_refresher is None or _rollup_refresher.done():
+        _rollup_refresher = asyncio.create_task(_refresh_rollup_loop())
+
+
+async def _database_metrics_payload(db: AsyncSession, exact: bool = False) -> dict:
+    """Build the database metrics payload."""
+    # Fetch all counts in a single round-trip instead of one COUNT(*)
+    # query per table; the metrics fetch is latency-bound, not CPU-bound.
+    # By default the two large append-only tables (document_chunks,
+    # chat_messages) use the planner's reltuples estimate, which is O(1);
+    # pass ?exact=true to force full counts everywhere.
+    sql = _DB_METRICS_EXACT_SQL if exact else _DB_METRICS_ESTIMATED_SQL
+    result = await db.execute(sql)
+    row = result.one()
+
+    return {
+        "total_profiles": row.total_profiles,
+        "total_documents": row.total_documents,
+        "processed_documents": row.processed_documents,
+        "unprocessed_documents": row.unprocessed_documents,
+        "total_chunks": row.total_chunks,
+        "total_sessions": row.total_sessions,
+        "total_messages": row.total_messages,
+        "timestamp": _now_iso()
+    }
+
+
+async def _bucket_counts(db: AsyncSession):
+    """Fetch the daily/weekly/monthly user-message counts.
+
+    Reads from the pre-binned daily rollup instead of scanning
+    chat_messages on every request; falls back to a single FILTER
+    aggregate over the raw table when the materialized view is not
+    available.
+    """
+    try:
+        result = await db.execute(_USAGE_ROLLUP_SQL)
+        return result.one()
+    except Exception:
+        await db.rollback()
+        result = await db.execute(_USAGE_FALLBACK_SQL)
+        return result.one()
+
+
+async def _usage_metrics_payload(db: AsyncSession) -> dict:
+    """Build the usage metrics payload."""
+    _ensure_rollup_refresher()
+
+    # The bucket counts and the popular-models lookup are independent;
+    # overlap them, giving the latter its own session since one
+    # AsyncSession serializes its queries
+    async def _popular_models():
+        async with AsyncSessionLocal() as models_db:
+            return await _get_popular_models(models_db)
+
+    row, popular_models = await asyncio.gather(
+        _bucket_counts(db),
+        _popular_models()
+    )
+
+    return {
+        "messages_last_day": int(row.daily),
+        "messages_last_week": int(row.weekly),
+        "messages_last_month": int(row.monthly),
+        "popular_models": popular_models,
+        "timestamp": _now_iso()
+    }
+
+
+def _system_metrics_payload() -> dict:
+    """Build the system metrics payload from the TTL cache."""
+    now = time.monotonic()
+
+    if (
+        _system_metrics_cache["value"] is None
+        or now - _system_metrics_cache["ts"] > SYSTEM_METRICS_TTL
+    ):
+        _system_metrics_cache["value"] = _sample_system_metrics()
+        _system_metrics_cache["ts"] = now
+
+    return {
+        **_system_metrics_cache["value"],
+        "timestamp": _now_iso()
+    }
+
+
+def _json_default(value):
+    """Make RowMapping rows and other odd values hashable as JSON."""
+    if isinstance(value, Mapping):
+        return dict(value)
+    return str(value)
+
+
+def _strip_timestamps(value):
+    """Drop timestamp keys at every nesting level.
+
+    The dashboard payload embeds the database/usage/system sub-payloads,
+    each carrying its own per-second timestamp, so a top-level-only
+    exclusion would still churn the ETag every second.
+    """
+    if isinstance(value, dict):
+        return {
+            k: _strip_timestamps(v)
+            for k, v in value.items() if k != "timestamp"
+        }
+    return value
+
+
+def _conditional_response(payload: dict, request: Request, response: Response):
+    """Attach caching headers; return 304 when the client is up to date.
+
+    Timestamp fields are excluded from the ETag so polling clients only
+    pay for a full response when the underlying metrics actually change.
+    """
+    etag = hashlib.blake2s(
+        json.dumps(
+            _strip_timestamps(payload), sort_keys=True, default=_json_default
+        ).encode()
+    ).hexdigest()
+
+    if request.headers.get("if-none-match") == etag:
+        return Response(status_code=304)
+
+    response.headers["ETag"] = etag
+    response.headers["Cache-Control"] = "private, max-age=10"
+    return payload
+
+
+@router.get("/analytics/database")
+async def get_database_metrics(
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db),
+    exact: bool = False
+):
+    """Get row counts for the core tables."""
+    payload = await _database_metrics_payload(db, exact)
+    return _conditional_response(payload, request, response)
+
+
+@router.get("/analytics/usage")
+async def get_usage_metrics(
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db)
+):
+    """Get user message counts for the last day, week and month."""
+    payload = await _usage_metrics_payload(db)
+    return _conditional_response(payload, request, response)
+
+
+@router.get("/analytics/system")
+async def get_system_metrics(request: Request, response: Response):
+    """Get system resource metrics (cached with a short TTL)."""
+    return _conditional_response(_system_metrics_payload(), request, response)
+
+
+@router.get("/analytics/dashboard")
+async def get_analytics_dashboard(request: Request, response: Response):
+    """Aggregate system, database and usage metrics for the dashboard."""
+    # The three sub-fetches are independent, so overlap them; each DB
+    # fetch gets its own session because an AsyncSession serializes all
+    # work on a single connection.
+    async def _database_metrics():
+        async with AsyncSessionLocal() as db:
+            return await _database_metrics_payload(db)
+
+    async def _usage_metrics():
+        async with AsyncSessionLocal() as db:
+            return await _usage_metrics_payload(db)
+
+    database, usage = await asyncio.gather(
+        _database_metrics(),
+        _usage_metrics()
+    )
+    system = _system_metrics_payload()
+
+    payload = {
+        "system": system,
+        "database": database,
+        "usage": usage,
+        "timestamp": _now_iso()
+    }
+    return _conditional_response(payload, request, response)
+
+
+@router.get("/analytics/performance")
+async def get_performance_metrics(
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_db)
+):
+    """Get table statistics and document-processing latency figures."""
+    # Catalog stats only change after ANALYZE and the processing average
+    # drifts slowly, so the whole payload is cached for 30 seconds.
+    now = time.monotonic()
+    if (
+        _performance_cache["value"] is not None
+        and now - _performance_cache["ts"] < PERFORMANCE_CACHE_TTL
+    ):
+        return _conditional_response(
+            _performance_cache["value"], request, response
+        )
+
+    # Columns are aliased to the response keys in SQL, so the rows can be
+    # returned as RowMappings without rebuilding a dict per row
+    table_stats = (await db.execute(_TABLE_STATS_SQL)).mappings().all()
+
+    result = await db.execute(_PROCESSING_STATS_SQL)
+    processing = result.one()
+
+    value = {
+        "tables": table_stats,
+        "document_processing": {
+            "processed_count": processing.processed_count,
+            "pending_count": processing.pending_count,
+            "avg_document_age_seconds": (
+                float(processing.avg_age_seconds)
+                if processing.avg_age_seconds is not None else None
+            )
+        },
+        "timestamp": _now_iso()
+    }
+    _performance_cache["value"] = value
+    _performance_cache["ts"] = now
+    return _conditional_response(value, request, response)
@@ -0,0 +1,218 @@
+"""
+Authentication endpoints (optional, controlled by ENABLE_AUTH).
+"""
+import asyncio
+from datetime import datetime, timedelta
+from typing import Optional
+from fastapi import APIRouter, Depends, HTTPException, status
+from jose import jwt
+from passlib.context import CryptContext
+from sqlalchemy import bindparam, select, update, or_
+from sqlalchemy.sql import func
+from sqlalchemy.ext.asyncio import AsyncSession
+from pydantic import BaseModel, Field
+
+from core.database import get_db
+from core.models import User
+from config.settings import get_settings
+
+router = APIRouter()
+
+# Settings are cached for the process lifetime; read them once at module
+# scope instead of per request in the handlers
+settings = get_settings()
+
+ACCESS_TOKEN_EXPIRE_MINUTES = 60
+JWT_ALGORITHM = "HS256"
+
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+# Fixed hash used to burn the same bcrypt work when a login names an
+# unknown user, so response timing does not reveal whether a username
+# exists
+_DUMMY_HASH = pwd_context.hash("not-a-real-password-placeholder")
+
+
+def hash_password(password: str) -> str:
+    """Hash a password for storage."""
+    return pwd_context.hash(password)
+
+
+def verify_password(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password against its stored hash."""
+    return pwd_context.verify(plain_password, hashed_password)
+
+
+async def hash_password_async(password: str) -> str:
+    """Hash a password in a worker thread.
+
+    Bcrypt deliberately burns CPU for tens of milliseconds; running it in
+    the event loop would block every other request on this worker.
+    """
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(None, hash_password, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password in a worker thread (see hash_password_async)."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        None, verify_password, plain_password, hashed_password
+    )
+
+
+def create_access_token(username: str) -> str:
+    """Create a signed JWT access token."""
+    payload = {
+        "sub": username,
+        "exp": datetime.utcnow() + timedelta(minutes=ACCESS_TOKEN_EXPIRE_MINUTES)
+    }
+    return jwt.encode(payload, settings.secret_key, algorithm=JWT_ALGORITHM)
+
+
+# Statements are built once at import; handlers only bind parameters,
+# so each execution hits the compiled cache and the driver's prepared
+# statement cache
+_UNIQUENESS_STMT = (
+    select(User.username, User.email)
+    .where(or_(
+        User.username == bindparam("username"),
+        User.email == bindparam("email")
+    ))
+    .limit(2)
+)
+
+_LOGIN_STMT = (
+    select(User.id, User.hashed_password, User.is_active)
+    .where(User.username == bindparam("username"))
+)
+
+_STAMP_LOGIN_STMT = (
+    update(User)
+    .where(User.id == bindparam("user_id"))
+    .values(last_login=func.now())
+    .returning(User.username)
+)
+
+
+# Pydantic models
+class UserRegister(BaseModel):
+    username: str = Field(..., min_length=3, max_length=100)
+    email: str = Field(..., max_length=255)
+    password: str = Field(..., min_length=8)
+
+
+class UserLogin(BaseModel):
+    username: str
+    password: str
+
+
+class UserResponse(BaseModel):
+    id: int
+    username: str
+    email: str
+    created_at: str
+
+    class Config:
+        from_attributes = True
+
+
+class TokenResponse(BaseModel):
+    access_token: str
+    token_type: str = "bearer"
+
+
+@router.post("/auth/register", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
+async def register_user(
+    user_data: UserRegister,
+    db: AsyncSession = Depends(get_db)
+):
+    """Register a new user account."""
+    # Check username/email uniqueness in one round-trip; selecting just
+    # the two indexed columns keeps this an index-only scan instead of
+    # materializing full user rows
+    result = await db.execute(
+        _UNIQUENESS_STMT,
+        {"username": user_data.username, "email": user_data.email}
+    )
+    collisions = result.all()
+    if collisions:
+        if any(username == user_data.username for username, _ in collisions):
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Username is already registered"
+            )
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Email is already registered"
+        )
+
+    hashed_password = await hash_password_async(user_data.password)
+
+    user = User(
+        username=user_data.username,
+        email=user_data.email,
+        hashed_password=hashed_password
+    )
+    db.add(user)
+    await db.commit()
+    await db.refresh(user)
+
+    # Values come straight from the ORM row; model_construct skips the
+    # redundant validation pass (FastAPI validates the response anyway)
+    return UserResponse.model_construct(
+        id=user.id,
+        username=user.username,
+        email=user.email,
+        created_at=user.created_at.isoformat()
+    )
+
+
+@router.post("/auth/login", response_model=TokenResponse)
+async def login_user(
+    login_data: UserLogin,
+    db: AsyncSession = Depends(get_db)
+):
+    """Authenticate a user and issue an access token."""
+    # Fetch only the columns the login path needs; skipping full ORM row
+    # materialization keeps this an index lookup plus a narrow tuple
+    result = await db.execute(
+        _LOGIN_STMT, {"username": login_data.username}
+    )
+    user = result.one_or_none()
+
+    if not user or not user.is_active:
+        # Constant-time path: do a dummy verification so unknown
+        # usernames cost the same as a failed password check
+        await verify_password_async(login_data.password, _DUMMY_HASH)
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid username or password"
+        )
+
+    if not await verify_password_async(login_data.password, user.hashed_password):
+        raise HTTPException(
+            status_code=status.HTTP_401_UNAUTHORIZED,
+            detail="Invalid username or password"
+        )
+
+    # Stamp last_login and re-read the username in one UPDATE ... RETURNING
+    # round-trip; the commit then piggybacks on the same exchange
+    row = (await db.execute(
+        _STAMP_LOGIN_STMT, {"user_id": user.id}
+    )).one()
+    await db.commit()
+
+    return TokenResponse.model_construct(
+        access_token=create_access_token(row.username),
+        token_type="bearer"
+    )
+
+
+@router.get("/auth/status")
+async def auth_status():
+    """Report whether authentication is enabled."""
+    return {
+        "auth_enabled": settings.enable_auth,
+        "timestamp": datetime.utcnow().isoformat()
+    }
@@ -1,16 +1,25 @@
 """
 Chat endpoints for RAG conversations.
 """
+import asyncio
+import json
 import uuid
-from typing import List, Optional
+from collections import OrderedDict
+from datetime import datetime
+from typing import List, Optional, Tuple
 from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.responses import StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel, Field
 
-from core.database import get_db
-from core.db_utils import ChatSessionRepository, ChatMessageRepository, ProfileRepository
+from core.database import get_db, AsyncSessionLocal
+from core.db_utils import ChatSessionRepository, ChatMessageRepository
 from core.ai_providers import get_provider_manager
+from core.embeddings import get_embedding_generator
 from core.retrieval import get_vector_retriever
+from core.profile_cache import get_cached_profile
+from core.semantic_cache import get_semantic_cache
+from core.singleflight import get_single_flight
 from config.settings import get_settings
 
 router = APIRouter()
@@ -22,7 +31,7 @@ class ChatMessage(BaseModel):
     role: str
     content: str
     context_chunks: List[dict]
-    timestamp: str
+    timestamp: datetime
 
     class Config:
         from_attributes = True
@@ -33,8 +42,8 @@ class ChatSession(BaseModel):
     session_name: Optional[str]
     profile_id: int
     messages: List[ChatMessage]
-    created_at: str
-    updated_at: str
+    created_at: datetime
+    updated_at: datetime
 
     class Config:
         from_attributes = True
@@ -53,7 +62,7 @@ class CreateSessionRequest(BaseModel):
 
 
 class SendMessageRequest(BaseModel):
-    session_id: str
+    session_id: uuid.UUID
     message: str
     profile_id: int
     max_context_chunks: int = Field(default=5, ge=1, le=10)
@@ -64,7 +73,7 @@ class SendMessageResponse(BaseModel):
     role: str
     content: str
     context_chunks: List[dict]
-    timestamp: str
+    timestamp: datetime
     usage: Optional[dict] = None
 
 
@@ -81,6 +90,75 @@ class ChatQueryResponse(BaseModel):
     search_time: float = 0.0
 
 
+# Repeat queries tend to retrieve the same top-K chunks, so memoize the
+# composed context block by chunk ID instead of re-joining ~20KB of
+# strings per request. LRU-bounded to keep memory flat.
+_context_cache: "OrderedDict[Tuple[str, ...], str]" = OrderedDict()
+_CONTEXT_CACHE_MAX = 128
+
+
+def _format_context(context_chunks: List[dict]) -> str:
+    """Render retrieved chunks as the context block for the prompt."""
+    key = tuple(chunk["id"] for chunk in context_chunks)
+    cached = _context_cache.get(key)
+    if cached is not None:
+        _context_cache.move_to_end(key)
+        return cached
+
+    context_text = "\n\n".join(
+        f"Document: {chunk.get('document_filename', 'Unknown')}\nContent: {chunk['content']}"
+        for chunk in context_chunks
+    )
+    _context_cache[key] = context_text
+    if len(_context_cache) > _CONTEXT_CACHE_MAX:
+        _context_cache.popitem(last=False)
+    return context_text
+
+
+def _sse_event(event: str, data: dict) -> str:
+    """Format one Server-Sent Event frame."""
+    return f"event: {event}\ndata: {json.dumps(data)}\n\n"
+
+
+async def _token_stream(
+    db: AsyncSession,
+    provider_manager,
+    profile,
+    formatted_prompt: str,
+    context_chunks: List[dict],
+    session_uuid: Optional[uuid.UUID] = None
+):
+    """Forward provider tokens as SSE frames as they arrive.
+
+    Tokens leave the server at first-token latency instead of waiting for
+    the full completion. When a session is given, the assembled message is
+    persisted once the stream ends, including on client disconnect.
+    """
+    parts = []
+    try:
+        async for token in provider_manager.stream_response(
+            provider_name=profile.provider,
+            model=profile.model,
+            prompt=formatted_prompt,
+            temperature=profile.settings.get("temperature", 0.7),
+            max_tokens=profile.settings.get("max_tokens", 1000)
+        ):
+            parts.append(token)
+            yield _sse_event("token", {"token": token})
+        yield _sse_event("done", {"context_chunks": context_chunks})
+    finally:
+        if session_uuid is not None:
+            if parts:
+                ChatMessageRepository(db).add(
+                    session_id=session_uuid,
+                    role="assistant",
+                    content="".join(parts),
+                    context_chunks=context_chunks
+                )
+            # One commit covers the staged user message and the reply
+            await db.commit()
+
+
 @router.get("/chat/sessions", response_model=ChatSessionList)
 async def list_chat_sessions(
     profile_id: Optional[int] = None,
@@ -94,36 +172,40 @@ async def list_chat_sessions(
     if limit < 1 or limit > 100:
         limit = 50
     
+    # Fetch the page and the true row count together; the count uses
+    # its own session because one AsyncSession serializes its queries
+    async def _count():
+        async with AsyncSessionLocal() as count_db:
+            return await ChatSessionRepository(count_db).count_by_profile(profile_id)
+
     session_repo = ChatSessionRepository(db)
-    
-    if profile_id:
-        sessions = await session_repo.get_by_profile(profile_id, limit, (page - 1) * limit)
-    else:
-        # Get all sessions (you might want to implement this in the repository)
-        sessions = await session_repo.get_by_profile(1, limit * 10, 0)  # Temporary
-    
-    return ChatSessionList(
+    sessions, total = await asyncio.gather(
+        session_repo.get_by_profile(profile_id, limit, (page - 1) * limit),
+        _count()
+    )
+
+    return ChatSessionList.model_construct(
         sessions=[
-            ChatSession(
+            ChatSession.model_construct(
                 id=str(session.id),
                 session_name=session.session_name,
                 profile_id=session.profile_id,
                 messages=[
-                    ChatMessage(
+                    ChatMessage.model_construct(
                         id=str(msg.id),
                         role=msg.role,
                         content=msg.content,
                         context_chunks=msg.context_chunks,
-                        timestamp=msg.timestamp.isoformat()
+                        timestamp=msg.timestamp
                     )
                     for msg in session.messages
                 ],
-                created_at=session.created_at.isoformat(),
-                updated_at=session.updated_at.isoformat()
+                created_at=session.created_at,
+                updated_at=session.updated_at
             )
             for session in sessions
         ],
-        total=len(sessions),
+        total=total,
         page=page,
         limit=limit
     )
@@ -136,8 +218,7 @@ async def create_chat_session(
 ):
     """Create a new chat session."""
     # Validate profile exists
-    profile_repo = ProfileRepository(db)
-    profile = await profile_repo.get_by_id(request.profile_id)
+    profile = await get_cached_profile(request.profile_id)
     if not profile:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -155,27 +236,19 @@ async def create_chat_session(
         session_name=session.session_name,
         profile_id=session.profile_id,
         messages=[],
-        created_at=session.created_at.isoformat(),
-        updated_at=session.updated_at.isoformat()
+        created_at=session.created_at,
+        updated_at=session.updated_at
     )
 
 
 @router.get("/chat/sessions/{session_id}", response_model=ChatSession)
 async def get_chat_session(
-    session_id: str,
+    session_id: uuid.UUID,
     db: AsyncSession = Depends(get_db)
 ):
     """Get a specific chat session with messages."""
-    try:
-        session_uuid = uuid.UUID(session_id)
-    except ValueError:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Invalid session ID format"
-        )
-    
     session_repo = ChatSessionRepository(db)
-    session = await session_repo.get_by_id(session_uuid)
+    session = await session_repo.get_by_id(session_id)
     
     if not session:
         raise HTTPException(
@@ -188,114 +261,164 @@ async def get_chat_session(
         session_name=session.session_name,
         profile_id=session.profile_id,
         messages=[
-            ChatMessage(
+            ChatMessage.model_construct(
                 id=str(msg.id),
                 role=msg.role,
                 content=msg.content,
                 context_chunks=msg.context_chunks,
-                timestamp=msg.timestamp.isoformat()
+                timestamp=msg.timestamp
             )
             for msg in session.messages
         ],
-        created_at=session.created_at.isoformat(),
-        updated_at=session.updated_at.isoformat()
+        created_at=session.created_at,
+        updated_at=session.updated_at
     )
 
 
 @router.post("/chat/query", response_model=SendMessageResponse)
 async def send_chat_message(
     request: SendMessageRequest,
+    stream: bool = False,
     db: AsyncSession = Depends(get_db)
 ):
-    """Send a message to a chat session and get AI response."""
-    try:
-        session_uuid = uuid.UUID(request.session_id)
-    except ValueError:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Invalid session ID format"
-        )
-    
-    # Validate session exists
+    """Send a message to a chat session and get AI response.
+
+    With ?stream=true the response is Server-Sent Events, one frame per
+    provider token.
+    """
+    # The session lookup, profile lookup and query embedding have no
+    # data dependency, so overlap them. The profile comes from the TTL
+    # cache, which uses its own session on a miss.
     session_repo = ChatSessionRepository(db)
-    session = await session_repo.get_by_id(session_uuid)
+    session, profile, query_embedding = await asyncio.gather(
+        session_repo.get_by_id(request.session_id),
+        get_cached_profile(request.profile_id),
+        get_embedding_generator().generate_single_embedding(request.message)
+    )
+
     if not session:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Chat session with ID {request.session_id} not found"
         )
-    
-    # Validate profile
-    profile_repo = ProfileRepository(db)
-    profile = await profile_repo.get_by_id(request.profile_id)
     if not profile:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Profile with ID {request.profile_id} not found"
         )
-    
-    # Save user message
+
+    # Stage the user message; it is committed together with the AI
+    # reply so the whole exchange costs one transaction and one fsync
     message_repo = ChatMessageRepository(db)
-    user_message = await message_repo.create(
-        session_id=session_uuid,
+    message_repo.add(
+        session_id=request.session_id,
         role="user",
         content=request.message
     )
-    
-    # Get context chunks using RAG
+
+    cache = get_semantic_cache()
+    if not stream:
+        hit = cache.check(request.profile_id, query_embedding)
+        if hit:
+            ai_message = message_repo.add(
+                session_id=request.session_id,
+                role="assistant",
+                content=hit.response,
+                context_chunks=hit.context_chunks
+            )
+            await db.commit()
+            await db.refresh(ai_message)
+            return SendMessageResponse(
+                id=str(ai_message.id),
+                role=ai_message.role,
+                content=ai_message.content,
+                context_chunks=ai_message.context_chunks,
+                timestamp=ai_message.timestamp,
+                usage=hit.usage
+            )
+
     vector_retriever = get_vector_retriever()
-    context_chunks = await vector_retriever.get_context_chunks(
-        session=db,
-        query=request.message,
-        profile_id=request.profile_id,
-        max_chunks=request.max_context_chunks,
-        similarity_threshold=0.7
-    )
-    
-    # Generate AI response
     provider_manager = get_provider_manager()
-    
-    # Build context for the prompt
-    context_text = "\n\n".join([
-        f"Document: {chunk.get('document_filename', 'Unknown')}\nContent: {chunk['content']}"
-        for chunk in context_chunks
-    ])
-    
-    # Format prompt with context
-    formatted_prompt = profile.prompt.format(
-        context=context_text,
-        question=request.message
-    )
-    
-    # Generate response
-    ai_response = await provider_manager.generate_response(
-        provider_name=profile.provider,
-        model=profile.model,
-        prompt=formatted_prompt,
-        temperature=profile.settings.get("temperature", 0.7),
-        max_tokens=profile.settings.get("max_tokens", 1000)
+
+    if stream:
+        context_chunks = await vector_retriever.get_context_chunks(
+            session=db,
+            query=request.message,
+            profile_id=request.profile_id,
+            max_chunks=request.max_context_chunks,
+            similarity_threshold=0.7,
+            query_embedding=query_embedding
+        )
+        formatted_prompt = profile.prompt.format(
+            context=_format_context(context_chunks),
+            question=request.message
+        )
+        return StreamingResponse(
+            _token_stream(
+                db, provider_manager, profile, formatted_prompt,
+                context_chunks, session_uuid=request.session_id
+            ),
+            media_type="text/event-stream"
+        )
+
+    async def _retrieve_and_generate():
+        context_chunks = await vector_retriever.get_context_chunks(
+            session=db,
+            query=request.message,
+            profile_id=request.profile_id,
+            max_chunks=request.max_context_chunks,
+            similarity_threshold=0.7,
+            query_embedding=query_embedding
+        )
+        ai_response = await provider_manager.generate_response(
+            provider_name=profile.provider,
+            model=profile.model,
+            prompt=profile.prompt.format(
+                context=_format_context(context_chunks),
+                question=request.message
+            ),
+            temperature=profile.settings.get("temperature", 0.7),
+            max_tokens=profile.settings.get("max_tokens", 1000)
+        )
+        return context_chunks, ai_response
+
+    # Coalesce identical concurrent questions: followers await the
+    # leader's pipeline run instead of repeating retrieval + generation
+    key = f"{request.profile_id}|{request.max_context_chunks}|{request.message}"
+    context_chunks, ai_response = await get_single_flight().do(
+        key, _retrieve_and_generate
     )
-    
+
     if ai_response.error:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"AI provider error: {ai_response.error}"
         )
     
-    # Save AI response
-    ai_message = await message_repo.create(
-        session_id=session_uuid,
+    cache.store(
+        request.profile_id,
+        query_embedding,
+        context_chunks,
+        ai_response.content,
+        usage=ai_response.usage
+    )
+
+    # Commit the user message and AI response together
+    ai_message = message_repo.add(
+        session_id=request.session_id,
         role="assistant",
         content=ai_response.content,
         context_chunks=context_chunks
     )
-    
+    await db.commit()
+    await db.refresh(ai_message)
+
     return SendMessageResponse(
         id=str(ai_message.id),
         role=ai_message.role,
         content=ai_message.content,
         context_chunks=ai_message.context_chunks,
-        timestamp=ai_message.timestamp.isoformat(),
+        timestamp=ai_message.timestamp,
         usage=ai_response.usage
     )
 
@@ -303,58 +426,102 @@ async def send_chat_message(
 @router.post("/chat/query-direct", response_model=ChatQueryResponse)
 async def query_without_session(
     request: ChatQueryRequest,
+    stream: bool = False,
     db: AsyncSession = Depends(get_db)
 ):
-    """Query the RAG system directly without creating a session."""
-    # Validate profile
-    profile_repo = ProfileRepository(db)
-    profile = await profile_repo.get_by_id(request.profile_id)
+    """Query the RAG system directly without creating a session.
+
+    With ?stream=true the response is Server-Sent Events, one frame per
+    provider token.
+    """
+    # The profile lookup and the query embedding are independent, so
+    # overlap them instead of awaiting serially
+    profile, query_embedding = await asyncio.gather(
+        get_cached_profile(request.profile_id),
+        get_embedding_generator().generate_single_embedding(request.query)
+    )
     if not profile:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Profile with ID {request.profile_id} not found"
         )
-    
-    # Get context chunks using RAG
+
+    cache = get_semantic_cache()
+    if not stream:
+        hit = cache.check(request.profile_id, query_embedding)
+        if hit:
+            return ChatQueryResponse(
+                response=hit.response,
+                context_chunks=hit.context_chunks,
+                usage=hit.usage,
+                search_time=0.0
+            )
+
     vector_retriever = get_vector_retriever()
-    context_chunks = await vector_retriever.get_context_chunks(
-        session=db,
-        query=request.query,
-        profile_id=request.profile_id,
-        max_chunks=request.max_context_chunks,
-        similarity_threshold=0.7
-    )
-    
-    # Generate AI response
     provider_manager = get_provider_manager()
-    
-    # Build context for the prompt
-    context_text = "\n\n".join([
-        f"Document: {chunk.get('document_filename', 'Unknown')}\nContent: {chunk['content']}"
-        for chunk in context_chunks
-    ])
-    
-    # Format prompt with context
-    formatted_prompt = profile.prompt.format(
-        context=context_text,
-        question=request.query
-    )
-    
-    # Generate response
-    ai_response = await provider_manager.generate_response(
-        provider_name=profile.provider,
-        model=profile.model,
-        prompt=formatted_prompt,
-        temperature=profile.settings.get("temperature", 0.7),
-        max_tokens=profile.settings.get("max_tokens", 1000)
+
+    if stream:
+        context_chunks = await vector_retriever.get_context_chunks(
+            session=db,
+            query=request.query,
+            profile_id=request.profile_id,
+            max_chunks=request.max_context_chunks,
+            similarity_threshold=0.7,
+            query_embedding=query_embedding
+        )
+        formatted_prompt = profile.prompt.format(
+            context=_format_context(context_chunks),
+            question=request.query
+        )
+        return StreamingResponse(
+            _token_stream(
+                db, provider_manager, profile, formatted_prompt,
+                context_chunks
+            ),
+            media_type="text/event-stream"
+        )
+
+    async def _retrieve_and_generate():
+        context_chunks = await vector_retriever.get_context_chunks(
+            session=db,
+            query=request.query,
+            profile_id=request.profile_id,
+            max_chunks=request.max_context_chunks,
+            similarity_threshold=0.7,
+            query_embedding=query_embedding
+        )
+        ai_response = await provider_manager.generate_response(
+            provider_name=profile.provider,
+            model=profile.model,
+            prompt=profile.prompt.format(
+                context=_format_context(context_chunks),
+                question=request.query
+            ),
+            temperature=profile.settings.get("temperature", 0.7),
+            max_tokens=profile.settings.get("max_tokens", 1000)
+        )
+        return context_chunks, ai_response
+
+    # Coalesce identical concurrent questions into one pipeline run
+    key = f"{request.profile_id}|{request.max_context_chunks}|{request.query}"
+    context_chunks, ai_response = await get_single_flight().do(
+        key, _retrieve_and_generate
     )
-    
+
     if ai_response.error:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"AI provider error: {ai_response.error}"
         )
     
+    cache.store(
+        request.profile_id,
+        query_embedding,
+        context_chunks,
+        ai_response.content,
+        usage=ai_response.usage
+    )
+
     return ChatQueryResponse(
         response=ai_response.content,
         context_chunks=context_chunks,
@@ -365,22 +532,14 @@ async def query_without_session(
 
 @router.delete("/chat/sessions/{session_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_chat_session(
-    session_id: str,
+    session_id: uuid.UUID,
     db: AsyncSession = Depends(get_db)
 ):
     """Delete a chat session and all its messages."""
-    try:
-        session_uuid = uuid.UUID(session_id)
-    except ValueError:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Invalid session ID format"
-        )
-    
     session_repo = ChatSessionRepository(db)
     
     # Check if session exists
-    session = await session_repo.get_by_id(session_uuid)
+    session = await session_repo.get_by_id(session_id)
     if not session:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -388,7 +547,7 @@ async def delete_chat_session(
         )
     
     try:
-        success = await session_repo.delete(session_uuid)
+        success = await session_repo.delete(session_id)
         if not success:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -403,23 +562,15 @@ async def delete_chat_session(
 
 @router.get("/chat/sessions/{session_id}/messages")
 async def get_session_messages(
-    session_id: str,
+    session_id: uuid.UUID,
     limit: int = 100,
     offset: int = 0,
     db: AsyncSession = Depends(get_db)
 ):
     """Get messages for a specific session."""
-    try:
-        session_uuid = uuid.UUID(session_id)
-    except ValueError:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Invalid session ID format"
-        )
-    
     # Validate session exists
     session_repo = ChatSessionRepository(db)
-    session = await session_repo.get_by_id(session_uuid)
+    session = await session_repo.get_by_id(session_id)
     if not session:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -427,17 +578,17 @@ async def get_session_messages(
         )
     
     message_repo = ChatMessageRepository(db)
-    messages = await message_repo.get_by_session(session_uuid, limit, offset)
+    messages = await message_repo.get_by_session(session_id, limit, offset)
     
     return {
-        "session_id": session_id,
+        "session_id": str(session_id),
         "messages": [
             {
                 "id": str(msg.id),
                 "role": msg.role,
                 "content": msg.content,
                 "context_chunks": msg.context_chunks,
-                "timestamp": msg.timestamp.isoformat()
+                "timestamp": msg.timestamp
             }
             for msg in messages
         ],
@@ -1,15 +1,19 @@
 """
 Document management endpoints.
 """
+import asyncio
 import uuid
 import os
 import aiofiles
-from typing import List, Optional
-from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form, BackgroundTasks
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+from fastapi import APIRouter, Depends, HTTPException, status, UploadFile, File, Form
 from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel, Field
 
-from core.database import get_db
+from core.database import get_db, AsyncSessionLocal
 from core.db_utils import DocumentRepository, DocumentChunkRepository
 from core.chunking import get_document_processor
 from core.embeddings import get_embedding_generator
@@ -17,6 +21,114 @@ from config.settings import get_settings
 
 router = APIRouter()
 
+# Built once so the per-upload allowed-type check is a frozenset lookup
+_ALLOWED_FILE_TYPES = frozenset(get_settings().allowed_file_types)
+
+
+# Documents are processed by a small fixed set of background consumer
+# tasks instead of one FastAPI BackgroundTask per upload, so concurrent
+# uploads queue up rather than competing for the embedding model and
+# the event loop. A few consumers overlap one document's parsing (done
+# in an executor) with another's embedding network calls, while the
+# bound keeps peak memory flat under an upload burst.
+_INGEST_CONCURRENCY = min(4, os.cpu_count() or 1)
+
+_processing_queue: Optional[asyncio.Queue] = None
+_consumer_tasks: List[asyncio.Task] = []
+
+
+# Ingest job registry: upload returns a job ID immediately and clients
+# poll /documents/{job_id}/status. Bounded so long-running processes do
+# not accumulate finished entries forever.
+_ingest_jobs: "OrderedDict[str, Dict[str, Any]]" = OrderedDict()
+_INGEST_JOBS_MAX = 1024
+
+
+async def _processing_loop() -> None:
+    """Drain the processing queue one job at a time."""
+    while True:
+        job = await _processing_queue.get()
+        try:
+            await job()
+        except Exception as e:
+            print(f"❌ Document processing job failed: {e}")
+        finally:
+            _processing_queue.task_done()
+
+
+async def _enqueue_job(job) -> None:
+    """Put a zero-arg coroutine function on the processing queue."""
+    global _processing_queue
+    if _processing_queue is None:
+        _processing_queue = asyncio.Queue()
+    _consumer_tasks[:] = [task for task in _consumer_tasks if not task.done()]
+    loop = asyncio.get_running_loop()
+    while len(_consumer_tasks) < _INGEST_CONCURRENCY:
+        _consumer_tasks.append(loop.create_task(_processing_loop()))
+    await _processing_queue.put(job)
+
+
+async def enqueue_document_processing(
+    document_id: str,
+    file_path: str,
+    mime_type: str,
+    profile_id: int
+) -> None:
+    """Queue a document for background processing."""
+    await _enqueue_job(
+        lambda: process_document_background(
+            document_id, file_path, mime_type, profile_id
+        )
+    )
+
+
+def _register_ingest_job(job_id: str, original_filename: str) -> None:
+    """Track a new ingest job, evicting the oldest entry when full."""
+    _ingest_jobs[job_id] = {
+        "status": "queued",
+        "document_id": None,
+        "original_filename": original_filename,
+        "error": None
+    }
+    if len(_ingest_jobs) > _INGEST_JOBS_MAX:
+        _ingest_jobs.popitem(last=False)
+
+
+async def _ingest_document(
+    job_id: str,
+    file_path: str,
+    filename: str,
+    original_filename: str,
+    file_size: int,
+    mime_type: str,
+    profile_id: int
+) -> None:
+    """Create the document row and process it, tracking job status."""
+    job = _ingest_jobs.get(job_id, {})
+    job["status"] = "processing"
+    try:
+        async with AsyncSessionLocal() as db:
+            document = await DocumentRepository(db).create(
+                filename=filename,
+                original_filename=original_filename,
+                profile_id=profile_id,
+                file_path=file_path,
+                file_size=file_size,
+                mime_type=mime_type,
+                metadata={"upload_source": "api"}
+            )
+        job["document_id"] = str(document.id)
+        await process_document_background(
+            str(document.id), file_path, mime_type, profile_id
+        )
+        job["status"] = "completed"
+    except Exception as e:
+        job["status"] = "failed"
+        job["error"] = str(e)
+        # Without a document row nothing references the file; drop it
+        if job.get("document_id") is None and os.path.exists(file_path):
+            os.remove(file_path)
+
 
 # Pydantic models
 class DocumentResponse(BaseModel):
@@ -25,7 +137,7 @@ class DocumentResponse(BaseModel):
     original_filename: str
     file_size: Optional[int]
     mime_type: Optional[str]
-    upload_date: str
+    upload_date: datetime
     processed: bool
     profile_id: int
     metadata: dict
@@ -41,8 +153,21 @@ class DocumentListResponse(BaseModel):
     limit: int
 
 
+class UploadAcceptedResponse(BaseModel):
+    job_id: str
+    status: str
+
+
+class IngestJobStatusResponse(BaseModel):
+    job_id: str
+    status: str
+    document_id: Optional[str]
+    original_filename: Optional[str]
+    error: Optional[str]
+
+
 class DocumentProcessRequest(BaseModel):
-    document_id: str
+    document_id: uuid.UUID
     profile_id: int
 
 
@@ -90,30 +215,34 @@ async def list_documents(
     if limit < 1 or limit > 100:
         limit = 50
     
+    # Fetch the page and the true row count together; the count uses
+    # its own session because one AsyncSession serializes its queries
+    async def _count():
+        async with AsyncSessionLocal() as count_db:
+            return await DocumentRepository(count_db).count_by_profile(profile_id)
+
     document_repo = DocumentRepository(db)
-    
-    if profile_id:
-        documents = await document_repo.get_by_profile(profile_id, limit, (page - 1) * limit)
-    else:
-        # Get all documents (you might want to implement this in the repository)
-        documents = await document_repo.get_by_profile(1, limit * 10, 0)  # Temporary
-    
-    return DocumentListResponse(
+    documents, total = await asyncio.gather(
+        document_repo.get_by_profile(profile_id, limit, (page - 1) * limit),
+        _count()
+    )
+
+    return DocumentListResponse.model_construct(
         documents=[
-            DocumentResponse(
+            DocumentResponse.model_construct(
                 id=str(doc.id),
                 filename=doc.filename,
                 original_filename=doc.original_filename,
                 file_size=doc.file_size,
                 mime_type=doc.mime_type,
-                upload_date=doc.upload_date.isoformat(),
+                upload_date=doc.upload_date,
                 processed=doc.processed,
                 profile_id=doc.profile_id,
                 metadata=doc.metadata
             )
             for doc in documents
         ],
-        total=len(documents),
+        total=total,
         page=page,
         limit=limit
     )
@@ -121,20 +250,12 @@ async def list_documents(
 
 @router.get("/documents/{document_id}", response_model=DocumentResponse)
 async def get_document(
-    document_id: str,
+    document_id: uuid.UUID,
     db: AsyncSession = Depends(get_db)
 ):
     """Get a specific document by ID."""
-    try:
-        doc_uuid = uuid.UUID(document_id)
-    except ValueError:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Invalid document ID format"
-        )
-    
     document_repo = DocumentRepository(db)
-    document = await document_repo.get_by_id(doc_uuid)
+    document = await document_repo.get_by_id(document_id)
     
     if not document:
         raise HTTPException(
@@ -148,21 +269,24 @@ async def get_document(
         original_filename=document.original_filename,
         file_size=document.file_size,
         mime_type=document.mime_type,
-        upload_date=document.upload_date.isoformat(),
+        upload_date=document.upload_date,
         processed=document.processed,
         profile_id=document.profile_id,
         metadata=document.metadata
     )
 
 
-@router.post("/documents/upload", response_model=DocumentResponse, status_code=status.HTTP_201_CREATED)
+@router.post("/documents/upload", response_model=UploadAcceptedResponse, status_code=status.HTTP_202_ACCEPTED)
 async def upload_document(
-    background_tasks: BackgroundTasks,
     file: UploadFile = File(...),
-    profile_id: int = Form(...),
-    db: AsyncSession = Depends(get_db)
+    profile_id: int = Form(...)
 ):
-    """Upload a new document."""
+    """Upload a new document.
+
+    The upload is accepted as soon as the file is on disk; the database
+    row and chunk processing happen on the background consumer. Poll
+    /documents/{job_id}/status for progress.
+    """
     settings = get_settings()
     
     # Validate file size
@@ -172,63 +296,59 @@ async def upload_document(
             detail=f"File size exceeds maximum allowed size of {settings.max_file_size} bytes"
         )
     
-    # Validate file type
-    file_extension = file.filename.split('.')[-1].lower() if '.' in file.filename else ''
-    if file_extension not in settings.allowed_file_types:
+    # Validate file type; splitext once and normalize so mixed-case
+    # extensions (.PDF) validate and are stored consistently on disk
+    file_extension = os.path.splitext(file.filename or '')[1].lstrip('.').lower() or 'txt'
+    if file_extension not in _ALLOWED_FILE_TYPES:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"File type '{file_extension}' is not allowed. Allowed types: {settings.allowed_file_types}"
         )
-    
-    # Create upload directory if it doesn't exist
-    upload_dir = settings.upload_dir
-    os.makedirs(upload_dir, exist_ok=True)
-    
-    # Generate unique filename
+
+    # Generate unique filename; the upload directory is created once at
+    # startup in the application lifespan
     file_id = uuid.uuid4()
-    file_extension = file.filename.split('.')[-1] if '.' in file.filename else 'txt'
     filename = f"{file_id}.{file_extension}"
-    file_path = os.path.join(upload_dir, filename)
+    file_path = str(Path(settings.upload_dir) / filename)
     
     try:
-        # Save file
+        # Stream the upload to disk in 1 MiB chunks so the body never
+        # sits fully in memory; oversized uploads abort as soon as the
+        # running total crosses the limit instead of after a full read
+        total = 0
         async with aiofiles.open(file_path, 'wb') as f:
-            content = await file.read()
-            await f.write(content)
-        
-        # Create document record
-        document_repo = DocumentRepository(db)
-        document = await document_repo.create(
-            filename=filename,
-            original_filename=file.filename,
-            profile_id=profile_id,
-            file_path=file_path,
-            file_size=len(content),
-            mime_type=file.content_type,
-            metadata={"upload_source": "api"}
-        )
-        
-        # Schedule background processing
-        background_tasks.add_task(
-            process_document_background,
-            str(document.id),
-            file_path,
-            file.content_type,
-            profile_id
-        )
-        
-        return DocumentResponse(
-            id=str(document.id),
-            filename=document.filename,
-            original_filename=document.original_filename,
-            file_size=document.file_size,
-            mime_type=document.mime_type,
-            upload_date=document.upload_date.isoformat(),
-            processed=document.processed,
-            profile_id=document.profile_id,
-            metadata=document.metadata
+            while chunk := await file.read(1 << 20):
+                total += len(chunk)
+                if total > settings.max_file_size:
+                    raise HTTPException(
+                        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+                        detail=f"File size exceeds maximum allowed size of {settings.max_file_size} bytes"
+                    )
+                await f.write(chunk)
+
+        # Hand the DB insert and chunk processing to the background
+        # consumer; the response only waits for the disk write
+        job_id = str(uuid.uuid4())
+        _register_ingest_job(job_id, file.filename)
+        await _enqueue_job(
+            lambda: _ingest_document(
+                job_id=job_id,
+                file_path=file_path,
+                filename=filename,
+                original_filename=file.filename,
+                file_size=total,
+                mime_type=file.content_type,
+                profile_id=profile_id
+            )
         )
-        
+
+        return UploadAcceptedResponse(job_id=job_id, status="queued")
+
+    except HTTPException:
+        # Clean up the partial file on mid-stream aborts (e.g. 413)
+        if os.path.exists(file_path):
+            os.remove(file_path)
+        raise
     except Exception as e:
         # Clean up file if document creation failed
         if os.path.exists(file_path):
@@ -239,23 +359,33 @@ async def upload_document(
         )
 
 
+@router.get("/documents/{job_id}/status", response_model=IngestJobStatusResponse)
+async def get_ingest_job_status(job_id: uuid.UUID):
+    """Get the status of an upload ingest job."""
+    job = _ingest_jobs.get(str(job_id))
+    if job is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Ingest job with ID {job_id} not found"
+        )
+
+    return IngestJobStatusResponse(
+        job_id=str(job_id),
+        status=job["status"],
+        document_id=job["document_id"],
+        original_filename=job["original_filename"],
+        error=job["error"]
+    )
+
+
 @router.post("/documents/process", response_model=DocumentProcessResponse)
 async def process_document(
     request: DocumentProcessRequest,
-    background_tasks: BackgroundTasks,
     db: AsyncSession = Depends(get_db)
 ):
     """Manually trigger document processing."""
-    try:
-        doc_uuid = uuid.UUID(request.document_id)
-    except ValueError:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Invalid document ID format"
-        )
-    
     document_repo = DocumentRepository(db)
-    document = await document_repo.get_by_id(doc_uuid)
+    document = await document_repo.get_by_id(request.document_id)
     
     if not document:
         raise HTTPException(
@@ -265,23 +395,22 @@ async def process_document(
     
     if document.processed:
         return DocumentProcessResponse(
-            document_id=request.document_id,
+            document_id=str(request.document_id),
             status="already_processed",
             chunks_created=0,
             message="Document is already processed"
         )
     
     # Schedule background processing
-    background_tasks.add_task(
-        process_document_background,
-        request.document_id,
+    await enqueue_document_processing(
+        str(request.document_id),
         document.file_path,
         document.mime_type,
         request.profile_id
     )
     
     return DocumentProcessResponse(
-        document_id=request.document_id,
+        document_id=str(request.document_id),
         status="processing",
         chunks_created=0,
         message="Document processing started"
@@ -299,12 +428,16 @@ async def process_document_background(
     
     async with AsyncSessionLocal() as db:
         try:
-            # Process document
+            # Parse and chunk in a worker thread; this step is pure CPU
+            # and would otherwise stall the event loop
             processor = get_document_processor()
-            text, doc_metadata, chunks = processor.process_document(
-                file_path=file_path,
-                mime_type=mime_type,
-                metadata={"profile_id": profile_id}
+            text, doc_metadata, chunks = await asyncio.get_running_loop().run_in_executor(
+                None,
+                lambda: processor.process_document(
+                    file_path=file_path,
+                    mime_type=mime_type,
+                    metadata={"profile_id": profile_id}
+                )
             )
             
             # Generate embeddings for chunks
@@ -313,47 +446,42 @@ async def process_document_background(
             
             embedding_result = await embedding_generator.generate_embeddings(chunk_texts)
             
-            # Save chunks to database
+            # Save all chunks in one bulk insert instead of a round-trip
+            # and commit per chunk
             chunk_repo = DocumentChunkRepository(db)
-            chunks_created = 0
-            
-            for i, (chunk, embedding) in enumerate(zip(chunks, embedding_result.embeddings)):
-                await chunk_repo.create(
-                    document_id=uuid.UUID(document_id),
-                    profile_id=profile_id,
-                    chunk_index=chunk.chunk_index,
-                    content=chunk.content,
-                    embedding=embedding,
-                    metadata=chunk.metadata
-                )
-                chunks_created += 1
+            doc_uuid = uuid.UUID(document_id)
+            rows = [
+                {
+                    "document_id": doc_uuid,
+                    "profile_id": profile_id,
+                    "chunk_index": chunk.chunk_index,
+                    "content": chunk.content,
+                    "embedding": embedding,
+                    "metadata": chunk.metadata or {}
+                }
+                for chunk, embedding in zip(chunks, embedding_result.embeddings)
+            ]
+            chunks_created = await chunk_repo.bulk_create(rows)
             
             # Mark document as processed
             document_repo = DocumentRepository(db)
-            await document_repo.mark_processed(uuid.UUID(document_id))
+            await document_repo.mark_processed(doc_uuid)
             
             print(f"✅ Processed document {document_id}: {chunks_created} chunks created")
             
         except Exception as e:
             print(f"❌ Failed to process document {document_id}: {e}")
+            raise
 
 
 @router.delete("/documents/{document_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_document(
-    document_id: str,
+    document_id: uuid.UUID,
     db: AsyncSession = Depends(get_db)
 ):
     """Delete a document and its chunks."""
-    try:
-        doc_uuid = uuid.UUID(document_id)
-    except ValueError:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Invalid document ID format"
-        )
-    
     document_repo = DocumentRepository(db)
-    document = await document_repo.get_by_id(doc_uuid)
+    document = await document_repo.get_by_id(document_id)
     
     if not document:
         raise HTTPException(
@@ -367,7 +495,7 @@ async def delete_document(
             os.remove(document.file_path)
         
         # Delete document (chunks will be deleted by cascade)
-        success = await document_repo.delete(doc_uuid)
+        success = await document_repo.delete(document_id)
         if not success:
             raise HTTPException(
                 status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -401,7 +529,7 @@ async def search_documents(
     )
     
     results = [
-        SearchResult(
+        SearchResult.model_construct(
             id=str(result.chunk.id),
             content=result.chunk.content,
             similarity=result.similarity_score,
@@ -441,7 +569,7 @@ async def search_similar_chunks(
     )
     
     results = [
-        SearchResult(
+        SearchResult.model_construct(
             id=str(result.chunk.id),
             content=result.chunk.content,
             similarity=result.similarity_score,
@@ -463,23 +591,15 @@ async def search_similar_chunks(
 
 @router.get("/documents/{document_id}/chunks")
 async def get_document_chunks(
-    document_id: str,
+    document_id: uuid.UUID,
     db: AsyncSession = Depends(get_db)
 ):
     """Get all chunks for a specific document."""
-    try:
-        doc_uuid = uuid.UUID(document_id)
-    except ValueError:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Invalid document ID format"
-        )
-    
     chunk_repo = DocumentChunkRepository(db)
-    chunks = await chunk_repo.get_by_document(doc_uuid)
+    chunks = await chunk_repo.get_by_document(document_id)
     
     return {
-        "document_id": document_id,
+        "document_id": str(document_id),
         "chunks": [
             {
                 "id": str(chunk.id),
@@ -487,7 +607,7 @@ async def get_document_chunks(
                 "content": chunk.content,
                 "has_embedding": chunk.embedding is not None,
                 "metadata": chunk.metadata,
-                "created_at": chunk.created_at.isoformat()
+                "created_at": chunk.created_at
             }
             for chunk in chunks
         ],
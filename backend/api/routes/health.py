@@ -1,52 +1,86 @@
 """
 Health check endpoints.
 """
-from datetime import datetime
+import asyncio
+import time
+from functools import lru_cache
 from typing import Dict, Any
-from fastapi import APIRouter, Depends, HTTPException
-from sqlalchemy.ext.asyncio import AsyncSession
+from fastapi import APIRouter, HTTPException, Response
 
-from core.database import get_db, check_db_health
+from core.database import check_db_health, get_pool_metrics
 from core.ai_providers import get_provider_manager
 from core.embeddings import get_embedding_generator
+from core.singleflight import get_single_flight
 from config.settings import get_settings
 
 router = APIRouter()
 
 
+@lru_cache(maxsize=1)
+def _format_iso(epoch_second: int) -> str:
+    return time.strftime("%Y-%m-%dT%H:%M:%S", time.gmtime(epoch_second))
+
+
+def _now_iso() -> str:
+    """Current UTC time in ISO-8601 at second resolution.
+
+    Probe traffic can hit these endpoints 10-100x/s; memoizing the
+    formatted string per second drops the datetime allocation and
+    Python-level formatting from almost every call. Same pattern as the
+    analytics module.
+    """
+    return _format_iso(int(time.time()))
+
+
+# Static portion of the basic health payload, built once; only the
+# timestamp is spliced in per request
+_STATIC_HEALTH = {
+    "status": "healthy",
+    "service": "RAG Application API",
+    "version": "1.0.0"
+}
+
+# Liveness body pre-serialized entirely: probes can hit this path
+# 10-100x/s and should not pay JSON encoding per call
+_LIVENESS_BODY = b'{"status":"alive"}'
+
+
 @router.get("/health")
 async def health_check():
-    """Basic health check endpoint."""
+    """Basic health check endpoint.
+
+    Deliberately has no database dependency: probes hitting this path
+    must never check a connection out of the pool.
+    """
     return {
-        "status": "healthy",
-        "timestamp": datetime.utcnow().isoformat(),
-        "service": "RAG Application API",
-        "version": "1.0.0"
+        **_STATIC_HEALTH,
+        "timestamp": _now_iso()
     }
 
 
 @router.get("/status")
-async def status_check(db: AsyncSession = Depends(get_db)):
+async def status_check():
     """Detailed status check with system information."""
     settings = get_settings()
-    
-    # Check database health
-    db_healthy = await check_db_health()
-    
+
+    # The database ping and the embedding-provider lookup are
+    # independent I/O, so overlap them
+    embedding_generator = get_embedding_generator()
+    db_healthy, embedding_providers = await asyncio.gather(
+        check_db_health(),
+        embedding_generator.get_available_providers()
+    )
+
     # Check AI providers
     provider_manager = get_provider_manager()
     available_providers = provider_manager.get_available_providers()
-    
-    # Test embedding generator
-    embedding_generator = get_embedding_generator()
-    embedding_providers = await embedding_generator.get_available_providers()
-    
+
     # Overall status
     overall_status = "healthy" if db_healthy else "degraded"
     
     status_info = {
         "status": overall_status,
-        "timestamp": datetime.utcnow().isoformat(),
+        "timestamp": _now_iso(),
         "service": "RAG Application API",
         "version": "1.0.0",
         "environment": settings.environment,
@@ -77,58 +111,98 @@ async def status_check(db: AsyncSession = Depends(get_db)):
     return status_info
 
 
-@router.get("/health/detailed")
-async def detailed_health_check(db: AsyncSession = Depends(get_db)):
-    """Detailed health check with provider testing."""
-    settings = get_settings()
-    provider_manager = get_provider_manager()
-    embedding_generator = get_embedding_generator()
-    
-    # Test database
-    db_healthy = await check_db_health()
-    
-    # Test AI providers
-    provider_tests = {}
-    for provider_name in provider_manager.get_available_providers():
-        try:
-            # Test with a simple query
-            response = await provider_manager.generate_response(
+# Bound on each individual provider probe so one hung provider cannot
+# stall the whole detailed health check
+_PROBE_TIMEOUT = 5
+
+
+async def _probe_ai_provider(provider_manager, provider_name: str) -> Dict[str, Any]:
+    """Test one AI provider with a tiny completion."""
+    try:
+        response = await asyncio.wait_for(
+            provider_manager.generate_response(
                 provider_name=provider_name,
                 model=provider_manager.get_available_models(provider_name)[0],
                 prompt="Hello, this is a health check test.",
                 max_tokens=10
-            )
-            provider_tests[provider_name] = {
-                "status": "healthy" if not response.error else "error",
-                "error": response.error,
-                "response_time": "< 1s"  # Could be measured
-            }
-        except Exception as e:
-            provider_tests[provider_name] = {
-                "status": "error",
-                "error": str(e)
-            }
-    
-    # Test embedding providers
-    embedding_tests = {}
+            ),
+            timeout=_PROBE_TIMEOUT
+        )
+        return {
+            "status": "healthy" if not response.error else "error",
+            "error": response.error,
+            "response_time": f"< {_PROBE_TIMEOUT}s"
+        }
+    except Exception as e:
+        return {
+            "status": "error",
+            "error": str(e)
+        }
+
+
+async def _probe_embedding_provider(
+    embedding_generator,
+    provider_name: str,
+    model: str
+) -> Dict[str, Any]:
+    """Test one embedding provider."""
+    try:
+        return await asyncio.wait_for(
+            embedding_generator.test_provider(provider_name, model),
+            timeout=_PROBE_TIMEOUT
+        )
+    except Exception as e:
+        return {
+            "success": False,
+            "error": str(e),
+            "provider": provider_name
+        }
+
+
+# The detailed check makes real provider calls (tokens + latency), so
+# results are reused briefly and concurrent callers share one run
+_DETAILED_HEALTH_TTL = 15.0
+
+_detailed_health_cache = {"ts": 0.0, "value": None}
+
+
+async def _build_detailed_health() -> Dict[str, Any]:
+    """Run every probe and assemble the detailed health payload."""
+    settings = get_settings()
+    provider_manager = get_provider_manager()
+    embedding_generator = get_embedding_generator()
+
+    provider_names = provider_manager.get_available_providers()
     embedding_providers = await embedding_generator.get_available_providers()
-    for provider_name, models in embedding_providers.items():
-        if models:
-            try:
-                test_result = await embedding_generator.test_provider(
-                    provider_name, models[0]
-                )
-                embedding_tests[provider_name] = test_result
-            except Exception as e:
-                embedding_tests[provider_name] = {
-                    "success": False,
-                    "error": str(e),
-                    "provider": provider_name
-                }
-    
+    embedding_targets = [
+        (provider_name, models[0])
+        for provider_name, models in embedding_providers.items()
+        if models
+    ]
+
+    # Every probe is an independent network round-trip, so run the DB
+    # check and all provider tests concurrently; the endpoint then costs
+    # the slowest probe instead of the sum of all of them
+    results = await asyncio.gather(
+        check_db_health(),
+        *[_probe_ai_provider(provider_manager, name) for name in provider_names],
+        *[
+            _probe_embedding_provider(embedding_generator, name, model)
+            for name, model in embedding_targets
+        ]
+    )
+    db_healthy = results[0]
+    provider_tests = dict(zip(provider_names, results[1:1 + len(provider_names)]))
+    embedding_tests = {
+        name: result
+        for (name, _), result in zip(
+            embedding_targets, results[1 + len(provider_names):]
+        )
+    }
+
     detailed_status = {
         "status": "healthy" if db_healthy else "degraded",
-        "timestamp": datetime.utcnow().isoformat(),
+        "timestamp": _now_iso(),
         "database": {
             "status": "healthy" if db_healthy else "unhealthy",
             "connection": "connected" if db_healthy else "failed"
@@ -141,22 +215,69 @@ async def detailed_health_check(db: AsyncSession = Depends(get_db)):
             "log_level": settings.log_level
         }
     }
-    
+
+    _detailed_health_cache["value"] = detailed_status
+    _detailed_health_cache["ts"] = time.monotonic()
     return detailed_status
 
 
+@router.get("/health/detailed")
+async def detailed_health_check(force: bool = False):
+    """Detailed health check with provider testing.
+
+    Results are cached for a short TTL and concurrent callers coalesce
+    onto a single probe run, so monitoring systems hammering this
+    endpoint cost one set of provider calls per TTL window. Pass
+    ?force=true to bypass the cache.
+    """
+    if (
+        not force
+        and _detailed_health_cache["value"] is not None
+        and time.monotonic() - _detailed_health_cache["ts"] < _DETAILED_HEALTH_TTL
+    ):
+        return _detailed_health_cache["value"]
+
+    return await get_single_flight().do(
+        "health:detailed", _build_detailed_health
+    )
+
+
+@router.get("/health/db-pool")
+async def db_pool_metrics():
+    """Connection pool utilization and checkout-latency percentiles."""
+    return {
+        **get_pool_metrics(),
+        "timestamp": _now_iso()
+    }
+
+
+# Bound on the readiness ping: when the pool is exhausted the probe
+# should report not-ready quickly instead of queueing behind requests
+# for the full pool_timeout
+_READINESS_TIMEOUT = 2
+
+
 @router.get("/health/ready")
-async def readiness_check(db: AsyncSession = Depends(get_db)):
+async def readiness_check():
     """Kubernetes readiness probe endpoint."""
-    db_healthy = await check_db_health()
-    
+    try:
+        db_healthy = await asyncio.wait_for(
+            check_db_health(), timeout=_READINESS_TIMEOUT
+        )
+    except asyncio.TimeoutError:
+        db_healthy = False
+
     if not db_healthy:
         raise HTTPException(status_code=503, detail="Service not ready")
-    
+
     return {"status": "ready"}
 
 
 @router.get("/health/live")
 async def liveness_check():
-    """Kubernetes liveness probe endpoint."""
-    return {"status": "alive"}
+    """Kubernetes liveness probe endpoint.
+
+    Static pre-serialized response on purpose — no pool checkout, no
+    I/O, no JSON encoding.
+    """
+    return Response(content=_LIVENESS_BODY, media_type="application/json")
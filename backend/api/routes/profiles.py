@@ -1,18 +1,62 @@
 """
 Profile management endpoints.
 """
-from typing import List, Optional
+import asyncio
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
 from fastapi import APIRouter, Depends, HTTPException, status
 from sqlalchemy.ext.asyncio import AsyncSession
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, model_validator
 
-from core.database import get_db
+from core.database import get_db, AsyncSessionLocal
 from core.db_utils import ProfileRepository
+from core.profile_cache import invalidate_profile_cache
 from core.ai_providers import get_provider_manager
 from config.settings import get_settings
 
 router = APIRouter()
 
+# Provider/model metadata only changes when the provider configuration
+# is reloaded, so the composed /config responses are cached briefly
+# instead of re-walking every provider and model per request
+_CONFIG_CACHE_TTL = 60.0
+
+_config_cache: Dict[Tuple[str, Optional[str]], Tuple[float, dict]] = {}
+
+
+def _config_cache_get(key: Tuple[str, Optional[str]]) -> Optional[dict]:
+    """Return the cached payload for key, or None when stale/missing."""
+    entry = _config_cache.get(key)
+    if entry is not None and time.monotonic() - entry[0] < _CONFIG_CACHE_TTL:
+        return entry[1]
+    return None
+
+
+def _config_cache_put(key: Tuple[str, Optional[str]], value: dict) -> dict:
+    _config_cache[key] = (time.monotonic(), value)
+    return value
+
+
+def _validate_provider_model(provider: Optional[str], model: Optional[str]) -> None:
+    """Check a provider/model pair against the manager's lookup sets.
+
+    Runs inside request-body validation, so bad payloads are rejected
+    with a 422 before the route body ever checks a connection out of
+    the pool.
+    """
+    provider_manager = get_provider_manager()
+    if provider is not None and provider not in provider_manager.available_providers_set:
+        raise ValueError(f"Provider '{provider}' is not available")
+    if (
+        provider is not None
+        and model is not None
+        and model not in provider_manager.available_models_set[provider]
+    ):
+        raise ValueError(
+            f"Model '{model}' is not available for provider '{provider}'"
+        )
+
 
 # Pydantic models for request/response
 class ProfileCreate(BaseModel):
@@ -23,6 +67,11 @@ class ProfileCreate(BaseModel):
     model: str = Field(..., description="AI model name")
     settings: dict = Field(default_factory=dict, description="Profile settings")
 
+    @model_validator(mode="after")
+    def _check_provider_model(self):
+        _validate_provider_model(self.provider, self.model)
+        return self
+
 
 class ProfileUpdate(BaseModel):
     name: Optional[str] = Field(None, min_length=1, max_length=255)
@@ -32,6 +81,11 @@ class ProfileUpdate(BaseModel):
     model: Optional[str] = None
     settings: Optional[dict] = None
 
+    @model_validator(mode="after")
+    def _check_provider_model(self):
+        _validate_provider_model(self.provider, self.model)
+        return self
+
 
 class ProfileResponse(BaseModel):
     id: int
@@ -41,8 +95,10 @@ class ProfileResponse(BaseModel):
     provider: str
     model: str
     settings: dict
-    created_at: str
-    updated_at: str
+    # datetime fields serialize to ISO-8601 on the way out, skipping a
+    # Python-level isoformat() per row
+    created_at: datetime
+    updated_at: datetime
 
     class Config:
         from_attributes = True
@@ -67,30 +123,25 @@ async def list_profiles(
     if limit < 1 or limit > 100:
         limit = 50
     
+    # Paginate in SQL and fetch the true row count concurrently; the
+    # count uses its own session because one AsyncSession serializes
+    # its queries
+    async def _count():
+        async with AsyncSessionLocal() as count_db:
+            return await ProfileRepository(count_db).count()
+
     profile_repo = ProfileRepository(db)
-    profiles = await profile_repo.get_all()
-    
-    # Simple pagination
-    start_idx = (page - 1) * limit
-    end_idx = start_idx + limit
-    paginated_profiles = profiles[start_idx:end_idx]
-    
+    paginated_profiles, total = await asyncio.gather(
+        profile_repo.get_page((page - 1) * limit, limit),
+        _count()
+    )
+
     return ProfileListResponse(
         profiles=[
-            ProfileResponse(
-                id=p.id,
-                name=p.name,
-                description=p.description,
-                prompt=p.prompt,
-                provider=p.provider,
-                model=p.model,
-                settings=p.settings,
-                created_at=p.created_at.isoformat(),
-                updated_at=p.updated_at.isoformat()
-            )
+            ProfileResponse.model_validate(p)
             for p in paginated_profiles
         ],
-        total=len(profiles),
+        total=total,
         page=page,
         limit=limit
     )
@@ -111,17 +162,7 @@ async def get_profile(
             detail=f"Profile with ID {profile_id} not found"
         )
     
-    return ProfileResponse(
-        id=profile.id,
-        name=profile.name,
-        description=profile.description,
-        prompt=profile.prompt,
-        provider=profile.provider,
-        model=profile.model,
-        settings=profile.settings,
-        created_at=profile.created_at.isoformat(),
-        updated_at=profile.updated_at.isoformat()
-    )
+    return ProfileResponse.model_validate(profile)
 
 
 @router.post("/profiles", response_model=ProfileResponse, status_code=status.HTTP_201_CREATED)
@@ -129,22 +170,11 @@ async def create_profile(
     profile_data: ProfileCreate,
     db: AsyncSession = Depends(get_db)
 ):
-    """Create a new profile."""
-    # Validate provider and model
-    provider_manager = get_provider_manager()
-    if profile_data.provider not in provider_manager.get_available_providers():
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Provider '{profile_data.provider}' is not available"
-        )
-    
-    available_models = provider_manager.get_available_models(profile_data.provider)
-    if profile_data.model not in available_models:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail=f"Model '{profile_data.model}' is not available for provider '{profile_data.provider}'"
-        )
-    
+    """Create a new profile.
+
+    Provider/model validity is enforced by the ProfileCreate model, so
+    invalid payloads 422 before this body runs.
+    """
     profile_repo = ProfileRepository(db)
     
     try:
@@ -157,17 +187,7 @@ async def create_profile(
             settings=profile_data.settings
         )
         
-        return ProfileResponse(
-            id=profile.id,
-            name=profile.name,
-            description=profile.description,
-            prompt=profile.prompt,
-            provider=profile.provider,
-            model=profile.model,
-            settings=profile.settings,
-            created_at=profile.created_at.isoformat(),
-            updated_at=profile.updated_at.isoformat()
-        )
+        return ProfileResponse.model_validate(profile)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -181,69 +201,54 @@ async def update_profile(
     profile_data: ProfileUpdate,
     db: AsyncSession = Depends(get_db)
 ):
-    """Update an existing profile."""
+    """Update an existing profile.
+
+    Provider/model validity is enforced by the ProfileUpdate model, so
+    invalid payloads 422 before this body runs.
+    """
     profile_repo = ProfileRepository(db)
-    
-    # Check if profile exists
-    existing_profile = await profile_repo.get_by_id(profile_id)
-    if not existing_profile:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Profile with ID {profile_id} not found"
-        )
-    
-    # Validate provider and model if provided
-    provider_manager = get_provider_manager()
-    if profile_data.provider:
-        if profile_data.provider not in provider_manager.get_available_providers():
+
+    # Only the fields the caller actually sent. An explicit null is
+    # honored just for description — the one nullable column — and
+    # dropped elsewhere, where it would only trip a NOT NULL constraint
+    update_data = {
+        field: value
+        for field, value in profile_data.model_dump(exclude_unset=True).items()
+        if value is not None or field == "description"
+    }
+
+    if not update_data:
+        # Nothing to change; just return the current row
+        profile = await profile_repo.get_by_id(profile_id)
+        if not profile:
             raise HTTPException(
-                status_code=status.HTTP_400_BAD_REQUEST,
-                detail=f"Provider '{profile_data.provider}' is not available"
+                status_code=status.HTTP_404_NOT_FOUND,
+                detail=f"Profile with ID {profile_id} not found"
             )
-        
-        if profile_data.model:
-            available_models = provider_manager.get_available_models(profile_data.provider)
-            if profile_data.model not in available_models:
-                raise HTTPException(
-                    status_code=status.HTTP_400_BAD_REQUEST,
-                    detail=f"Model '{profile_data.model}' is not available for provider '{profile_data.provider}'"
-                )
-    
-    # Prepare update data
-    update_data = {}
-    if profile_data.name is not None:
-        update_data["name"] = profile_data.name
-    if profile_data.description is not None:
-        update_data["description"] = profile_data.description
-    if profile_data.prompt is not None:
-        update_data["prompt"] = profile_data.prompt
-    if profile_data.provider is not None:
-        update_data["provider"] = profile_data.provider
-    if profile_data.model is not None:
-        update_data["model"] = profile_data.model
-    if profile_data.settings is not None:
-        update_data["settings"] = profile_data.settings
-    
+        return ProfileResponse.model_validate(profile)
+
+    # UPDATE ... RETURNING folds the existence check and the update
+    # into one round-trip; no row back means 404
     try:
-        updated_profile = await profile_repo.update(profile_id, **update_data)
-        
-        return ProfileResponse(
-            id=updated_profile.id,
-            name=updated_profile.name,
-            description=updated_profile.description,
-            prompt=updated_profile.prompt,
-            provider=updated_profile.provider,
-            model=updated_profile.model,
-            settings=updated_profile.settings,
-            created_at=updated_profile.created_at.isoformat(),
-            updated_at=updated_profile.updated_at.isoformat()
-        )
+        updated_profile = await profile_repo.update_returning(profile_id, **update_data)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to update profile: {str(e)}"
         )
 
+    if updated_profile is None:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Profile with ID {profile_id} not found"
+        )
+
+    # Drop the stale copy so chat/query handlers see the change
+    # without waiting out the TTL
+    invalidate_profile_cache(profile_id)
+
+    return ProfileResponse.model_validate(updated_profile)
+
 
 @router.delete("/profiles/{profile_id}", status_code=status.HTTP_204_NO_CONTENT)
 async def delete_profile(
@@ -252,28 +257,25 @@ async def delete_profile(
 ):
     """Delete a profile."""
     profile_repo = ProfileRepository(db)
-    
-    # Check if profile exists
-    existing_profile = await profile_repo.get_by_id(profile_id)
-    if not existing_profile:
-        raise HTTPException(
-            status_code=status.HTTP_404_NOT_FOUND,
-            detail=f"Profile with ID {profile_id} not found"
-        )
-    
+
+    # delete() already reports whether a row matched, so one statement
+    # covers both the delete and the existence check
     try:
         success = await profile_repo.delete(profile_id)
-        if not success:
-            raise HTTPException(
-                status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
-                detail="Failed to delete profile"
-            )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to delete profile: {str(e)}"
         )
 
+    if not success:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND,
+            detail=f"Profile with ID {profile_id} not found"
+        )
+
+    invalidate_profile_cache(profile_id)
+
 
 @router.get("/profiles/{profile_id}/stats")
 async def get_profile_stats(
@@ -306,8 +308,12 @@ async def get_profile_stats(
 @router.get("/config/providers")
 async def get_available_providers():
     """Get available AI providers and their models."""
+    cached = _config_cache_get(("providers", None))
+    if cached is not None:
+        return cached
+
     provider_manager = get_provider_manager()
-    
+
     providers = {}
     for provider_name in provider_manager.get_available_providers():
         models = provider_manager.get_available_models(provider_name)
@@ -329,50 +335,43 @@ async def get_available_providers():
                 "dimensions": model_config.get("dimensions")  # For embedding models
             }
     
-    return {
+    return _config_cache_put(("providers", None), {
         "providers": providers,
         "total_providers": len(providers),
         "total_models": sum(len(models["models"]) for models in providers.values())
-    }
+    })
 
 
 @router.get("/config/models")
 async def get_available_models(provider: Optional[str] = None):
     """Get available models, optionally filtered by provider."""
+    cached = _config_cache_get(("models", provider))
+    if cached is not None:
+        return cached
+
     provider_manager = get_provider_manager()
-    
+
     if provider:
-        if provider not in provider_manager.get_available_providers():
+        if provider not in provider_manager.available_providers_set:
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail=f"Provider '{provider}' is not available"
             )
-        
-        models = provider_manager.get_available_models(provider)
-        provider_instance = provider_manager.get_provider(provider)
-        
-        return {
+
+        # The manager prebuilds the per-model config mapping, so the
+        # filtered branch is a dict lookup instead of a rebuild
+        models = provider_manager.models_configs[provider]
+
+        return _config_cache_put(("models", provider), {
             "provider": provider,
-            "models": {
-                model: provider_instance.get_model_config(model)
-                for model in models
-            },
+            "models": models,
             "total_models": len(models)
-        }
+        })
     else:
-        # Return all models from all providers
-        all_models = {}
-        for provider_name in provider_manager.get_available_providers():
-            models = provider_manager.get_available_models(provider_name)
-            provider_instance = provider_manager.get_provider(provider_name)
-            
-            all_models[provider_name] = {
-                model: provider_instance.get_model_config(model)
-                for model in models
-            }
-        
-        return {
-            "all_models": all_models,
-            "total_providers": len(all_models),
-            "total_models": sum(len(models) for models in all_models.values())
-        }
+        # Return all models from all providers — the manager's
+        # precomputed mapping, handed straight to the serializer
+        return _config_cache_put(("models", None), {
+            "all_models": provider_manager.models_configs,
+            "total_providers": len(provider_manager.models_configs),
+            "total_models": provider_manager.total_models
+        })
@@ -1,15 +1,18 @@
 """
 WebSocket chat handler for real-time RAG conversations.
 """
-import json
 import uuid
 import asyncio
-from typing import Dict, Set, Optional
+from typing import Annotated, Dict, Literal, Optional, Set, Tuple, Union
+
+import orjson
 from fastapi import WebSocket, WebSocketDisconnect, HTTPException
+from pydantic import BaseModel, Field, TypeAdapter, ValidationError
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from core.database import AsyncSessionLocal
-from core.db_utils import ChatSessionRepository, ChatMessageRepository, ProfileRepository
+from core.db_utils import ChatSessionRepository, ChatMessageRepository
+from core.profile_cache import get_cached_profile
 from core.ai_providers import get_provider_manager
 from core.retrieval import get_vector_retriever
 import logging
@@ -17,24 +20,85 @@ import logging
 logger = logging.getLogger(__name__)
 
 
+def _encode_message(message: dict) -> str:
+    """Encode a websocket payload with orjson.
+
+    orjson serializes UUIDs and datetimes natively (default=str covers
+    the rest) and is several times faster than stdlib json, which
+    matters on the streaming path where every LLM chunk becomes a
+    frame. Text frames are kept because the frontend JSON.parses
+    event.data directly.
+    """
+    return orjson.dumps(message, default=str).decode()
+
+
+# Bound on each client's outbound queue: a consumer that falls this far
+# behind is disconnected rather than allowed to grow memory unbounded
+_SEND_QUEUE_MAX = 256
+
+# Streaming LLM chunks are coalesced into one frame per this many bytes
+# or this much elapsed time, whichever comes first
+_STREAM_FLUSH_BYTES = 256
+_STREAM_FLUSH_SECONDS = 0.02
+
+# ai_streaming frames fire many times per response; a fixed template
+# with %-substitution of three pre-encoded values skips building and
+# encoding a fresh dict per frame
+_AI_STREAMING_TEMPLATE = '{"type":"ai_streaming","chunk":%s,"session_id":%s,"timestamp":%s}'
+
+
+class _ClientConnection:
+    """A websocket with its bounded outbound queue and sender task."""
+
+    __slots__ = ("websocket", "queue", "task")
+
+    def __init__(self, websocket: WebSocket):
+        self.websocket = websocket
+        self.queue: "asyncio.Queue[str]" = asyncio.Queue(maxsize=_SEND_QUEUE_MAX)
+        self.task: Optional[asyncio.Task] = None
+
+
 class ConnectionManager:
-    """Manages WebSocket connections."""
-    
+    """Manages WebSocket connections.
+
+    Each client gets its own outbound queue drained by a long-lived
+    sender task, so producers (the RAG/LLM streaming loop, broadcasts)
+    just enqueue and never block on a slow socket.
+    """
+
     def __init__(self):
-        # Active connections: {session_id: {user_id: websocket}}
-        self.active_connections: Dict[str, Dict[str, WebSocket]] = {}
+        # Active connections in one flat map keyed by (session_id,
+        # user_id), with a session -> user_ids index for fanout. One
+        # dict slot plus one set entry per connection costs far less
+        # than a nested per-session dict when many sessions sit idle.
+        self.connections: Dict[Tuple[str, str], _ClientConnection] = {}
+        self.session_users: Dict[str, Set[str]] = {}
         # Typing indicators: {session_id: {user_id: timestamp}}
         self.typing_indicators: Dict[str, Dict[str, float]] = {}
-    
+
+    async def _sender(self, session_id: str, user_id: str, connection: _ClientConnection):
+        """Drain one client's queue onto its socket."""
+        try:
+            while True:
+                payload = await connection.queue.get()
+                await connection.websocket.send_text(payload)
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Error sending message to {user_id}: {e}")
+            self.disconnect(session_id, user_id)
+
     async def connect(self, websocket: WebSocket, session_id: str, user_id: str = "anonymous"):
         """Accept a WebSocket connection."""
         await websocket.accept()
-        
-        if session_id not in self.active_connections:
-            self.active_connections[session_id] = {}
-        
-        self.active_connections[session_id][user_id] = websocket
-        
+
+        connection = _ClientConnection(websocket)
+        connection.task = asyncio.create_task(
+            self._sender(session_id, user_id, connection)
+        )
+        self.connections[(session_id, user_id)] = connection
+        self.session_users.setdefault(session_id, set()).add(user_id)
+
         # Notify other users in the session
         await self.broadcast_to_session(
             session_id,
@@ -42,7 +106,7 @@ class ConnectionManager:
                 "type": "user_joined",
                 "user_id": user_id,
                 "session_id": session_id,
-                "timestamp": asyncio.get_event_loop().time()
+                "timestamp": asyncio.get_running_loop().time()
             },
             exclude_user=user_id
         )
@@ -50,45 +114,89 @@ class ConnectionManager:
         logger.info(f"User {user_id} connected to session {session_id}")
     
     def disconnect(self, session_id: str, user_id: str):
-        """Remove a WebSocket connection."""
-        if session_id in self.active_connections:
-            if user_id in self.active_connections[session_id]:
-                del self.active_connections[session_id][user_id]
-                
-                # Clean up empty sessions
-                if not self.active_connections[session_id]:
-                    del self.active_connections[session_id]
-        
+        """Remove a WebSocket connection and stop its sender task.
+
+        Uses get/pop instead of `in` checks followed by del, so each
+        mapping is hashed once — this runs on every disconnect and on
+        every slow-consumer drop.
+        """
+        connection = self.connections.pop((session_id, user_id), None)
+        if connection is not None and connection.task is not None:
+            if not connection.task.done():
+                connection.task.cancel()
+
+        users = self.session_users.get(session_id)
+        if users is not None:
+            users.discard(user_id)
+            # Clean up empty sessions
+            if not users:
+                self.session_users.pop(session_id, None)
+
         # Clean up typing indicators
-        if session_id in self.typing_indicators:
-            if user_id in self.typing_indicators[session_id]:
-                del self.typing_indicators[session_id][user_id]
-        
+        typing = self.typing_indicators.get(session_id)
+        if typing is not None:
+            typing.pop(user_id, None)
+
         logger.info(f"User {user_id} disconnected from session {session_id}")
     
-    async def send_personal_message(self, websocket: WebSocket, message: dict):
-        """Send a message to a specific WebSocket."""
+    async def send_personal_message(self, websocket: WebSocket, message: Union[dict, str]):
+        """Send a message to a specific WebSocket.
+
+        Accepts either a dict or an already-encoded payload so callers
+        that fan the same message out to many sockets can serialize it
+        once.
+        """
         try:
-            await websocket.send_text(json.dumps(message))
+            payload = message if isinstance(message, str) else _encode_message(message)
+            await websocket.send_text(payload)
         except Exception as e:
             logger.error(f"Error sending message: {e}")
     
-    async def broadcast_to_session(self, session_id: str, message: dict, exclude_user: Optional[str] = None):
-        """Broadcast a message to all users in a session."""
-        if session_id not in self.active_connections:
+    async def broadcast_to_session(self, session_id: str, message: Union[dict, str], exclude_user: Optional[str] = None):
+        """Broadcast a message to all users in a session.
+
+        The payload is serialized once, not per recipient — on a
+        streaming response fanned out to M clients the old per-socket
+        json.dumps cost M identical encodes. Callers on very hot paths
+        can pass an already-encoded payload string. Delivery is handed to each
+        client's sender task via its queue, so this never blocks on a
+        slow socket; a client whose queue is full is dropped rather
+        than allowed to stall or grow memory.
+        """
+        users = self.session_users.get(session_id)
+        if not users:
             return
-        
-        for user_id, websocket in self.active_connections[session_id].items():
+        # 1:1 sessions are the common case: when the only subscriber is
+        # the excluded sender there is nobody to deliver to, so skip
+        # the encode and the loop entirely
+        if exclude_user is not None and len(users) == 1 and exclude_user in users:
+            return
+
+        payload = message if isinstance(message, str) else _encode_message(message)
+        for user_id in list(users):
             if exclude_user and user_id == exclude_user:
                 continue
-            
-            await self.send_personal_message(websocket, message)
+
+            connection = self.connections.get((session_id, user_id))
+            if connection is None:
+                continue
+
+            try:
+                connection.queue.put_nowait(payload)
+            except asyncio.QueueFull:
+                logger.warning(
+                    f"Dropping slow consumer {user_id} in session {session_id}"
+                )
+                self.disconnect(session_id, user_id)
+                # disconnect() only drops bookkeeping; close the socket
+                # too (1013 Try Again Later) so the evicted client does
+                # not linger half-connected, still sending frames
+                asyncio.create_task(connection.websocket.close(code=1013))
     
     async def send_typing_indicator(self, session_id: str, user_id: str, is_typing: bool):
         """Send typing indicator to session."""
-        import time
-        current_time = time.time()
-        
+        current_time = asyncio.get_running_loop().time()
+
         if session_id not in self.typing_indicators:
             self.typing_indicators[session_id] = {}
         
@@ -110,38 +218,73 @@ class ConnectionManager:
         )
 
 
+# Inbound message schemas. One compiled discriminated-union adapter
+# decodes and validates each frame in a single pass through pydantic's
+# Rust core, replacing json.loads plus ad-hoc .get() shape checks.
+class JoinSessionMessage(BaseModel):
+    type: Literal["join_session"]
+
+
+class SendMessageMessage(BaseModel):
+    type: Literal["send_message"]
+    message: str = ""
+    profile_id: Optional[int] = None
+
+
+class TypingMessage(BaseModel):
+    type: Literal["typing"]
+    typing: bool = False
+
+
+_InboundMessage = Annotated[
+    Union[JoinSessionMessage, SendMessageMessage, TypingMessage],
+    Field(discriminator="type")
+]
+
+_inbound_adapter: TypeAdapter = TypeAdapter(_InboundMessage)
+
+
 # Global connection manager
 manager = ConnectionManager()
 
 
 async def websocket_endpoint(websocket: WebSocket, session_id: str, user_id: str = "anonymous"):
     """WebSocket endpoint for chat sessions."""
+    now = asyncio.get_running_loop().time
+
+    # Parse the session id once for the connection lifetime instead of
+    # re-walking the string on every inbound message
+    try:
+        session_uuid: Optional[uuid.UUID] = uuid.UUID(session_id)
+    except ValueError:
+        session_uuid = None
+
     await manager.connect(websocket, session_id, user_id)
-    
+
     try:
         while True:
             # Receive message from client
             data = await websocket.receive_text()
-            message = json.loads(data)
-            
-            # Handle different message types
-            message_type = message.get("type")
-            
-            if message_type == "join_session":
-                await handle_join_session(websocket, session_id, user_id, message)
-            elif message_type == "send_message":
-                await handle_send_message(websocket, session_id, user_id, message)
-            elif message_type == "typing":
-                await handle_typing(websocket, session_id, user_id, message)
-            else:
+            try:
+                message = _inbound_adapter.validate_json(data)
+            except ValidationError:
                 await manager.send_personal_message(
                     websocket,
                     {
                         "type": "error",
-                        "message": f"Unknown message type: {message_type}",
-                        "timestamp": asyncio.get_event_loop().time()
+                        "message": "Unknown or malformed message",
+                        "timestamp": now()
                     }
                 )
+                continue
+
+            # Dispatch on the validated message type
+            if isinstance(message, SendMessageMessage):
+                await handle_send_message(websocket, session_id, session_uuid, user_id, message)
+            elif isinstance(message, JoinSessionMessage):
+                await handle_join_session(websocket, session_id, session_uuid, user_id, message)
+            else:
+                await handle_typing(websocket, session_id, user_id, message)
     
     except WebSocketDisconnect:
         manager.disconnect(session_id, user_id)
@@ -150,21 +293,26 @@ async def websocket_endpoint(websocket: WebSocket, session_id: str, user_id: str
         manager.disconnect(session_id, user_id)
 
 
-async def handle_join_session(websocket: WebSocket, session_id: str, user_id: str, message: dict):
+async def handle_join_session(
+    websocket: WebSocket,
+    session_id: str,
+    session_uuid: Optional[uuid.UUID],
+    user_id: str,
+    message: JoinSessionMessage
+):
     """Handle join session message."""
-    try:
-        session_uuid = uuid.UUID(session_id)
-    except ValueError:
+    now = asyncio.get_running_loop().time
+    if session_uuid is None:
         await manager.send_personal_message(
             websocket,
             {
                 "type": "error",
                 "message": "Invalid session ID format",
-                "timestamp": asyncio.get_event_loop().time()
+                "timestamp": now()
             }
         )
         return
-    
+
     # Validate session exists
     async with AsyncSessionLocal() as db:
         session_repo = ChatSessionRepository(db)
@@ -176,7 +324,7 @@ async def handle_join_session(websocket: WebSocket, session_id: str, user_id: st
                 {
                     "type": "error",
                     "message": f"Session {session_id} not found",
-                    "timestamp": asyncio.get_event_loop().time()
+                    "timestamp": now()
                 }
             )
             return
@@ -189,28 +337,33 @@ async def handle_join_session(websocket: WebSocket, session_id: str, user_id: st
                 "session_id": session_id,
                 "session_name": session.session_name,
                 "profile_id": session.profile_id,
-                "timestamp": asyncio.get_event_loop().time()
+                "timestamp": now()
             }
         )
 
 
-async def handle_send_message(websocket: WebSocket, session_id: str, user_id: str, message: dict):
+async def handle_send_message(
+    websocket: WebSocket,
+    session_id: str,
+    session_uuid: Optional[uuid.UUID],
+    user_id: str,
+    message: SendMessageMessage
+):
     """Handle send message."""
-    try:
-        session_uuid = uuid.UUID(session_id)
-    except ValueError:
+    now = asyncio.get_running_loop().time
+    if session_uuid is None:
         await manager.send_personal_message(
             websocket,
             {
                 "type": "error",
                 "message": "Invalid session ID format",
-                "timestamp": asyncio.get_event_loop().time()
+                "timestamp": now()
             }
         )
         return
-    
-    user_message = message.get("message", "").strip()
-    profile_id = message.get("profile_id")
+
+    user_message = message.message.strip()
+    profile_id = message.profile_id
     
     if not user_message:
         await manager.send_personal_message(
@@ -218,7 +371,7 @@ async def handle_send_message(websocket: WebSocket, session_id: str, user_id: st
             {
                 "type": "error",
                 "message": "Message cannot be empty",
-                "timestamp": asyncio.get_event_loop().time()
+                "timestamp": now()
             }
         )
         return
@@ -229,50 +382,71 @@ async def handle_send_message(websocket: WebSocket, session_id: str, user_id: st
             {
                 "type": "error",
                 "message": "Profile ID is required",
-                "timestamp": asyncio.get_event_loop().time()
+                "timestamp": now()
             }
         )
         return
     
     async with AsyncSessionLocal() as db:
         try:
-            # Validate session and profile
+            # Validate session and profile. The profile comes from the
+            # shared TTL cache (its own session on a miss), overlapping
+            # the session lookup instead of following it — profiles
+            # change rarely but are read on every message.
             session_repo = ChatSessionRepository(db)
-            session = await session_repo.get_by_id(session_uuid)
-            
+
+            session, profile = await asyncio.gather(
+                session_repo.get_by_id(session_uuid),
+                get_cached_profile(profile_id)
+            )
+
             if not session:
                 await manager.send_personal_message(
                     websocket,
                     {
                         "type": "error",
                         "message": f"Session {session_id} not found",
-                        "timestamp": asyncio.get_event_loop().time()
+                        "timestamp": now()
                     }
                 )
                 return
             
-            profile_repo = ProfileRepository(db)
-            profile = await profile_repo.get_by_id(profile_id)
-            
             if not profile:
                 await manager.send_personal_message(
                     websocket,
                     {
                         "type": "error",
                         "message": f"Profile {profile_id} not found",
-                        "timestamp": asyncio.get_event_loop().time()
+                        "timestamp": now()
                     }
                 )
                 return
             
-            # Save user message
+            # Save the user message and run RAG retrieval concurrently
+            # — the vector search does not depend on the insert, so it
+            # gets its own session and overlaps it
             message_repo = ChatMessageRepository(db)
-            user_msg = await message_repo.create(
-                session_id=session_uuid,
-                role="user",
-                content=user_message
+            vector_retriever = get_vector_retriever()
+
+            async def _retrieve_context():
+                async with AsyncSessionLocal() as search_db:
+                    return await vector_retriever.get_context_chunks(
+                        session=search_db,
+                        query=user_message,
+                        profile_id=profile_id,
+                        max_chunks=profile.settings.get("max_context_chunks", 5),
+                        similarity_threshold=0.7
+                    )
+
+            user_msg, context_chunks = await asyncio.gather(
+                message_repo.create(
+                    session_id=session_uuid,
+                    role="user",
+                    content=user_message
+                ),
+                _retrieve_context()
             )
-            
+
             # Broadcast user message to all users in session
             await manager.broadcast_to_session(
                 session_id,
@@ -286,25 +460,17 @@ async def handle_send_message(websocket: WebSocket, session_id: str, user_id: st
                     "user_id": user_id
                 }
             )
-            
-            # Get context chunks using RAG
-            vector_retriever = get_vector_retriever()
-            context_chunks = await vector_retriever.get_context_chunks(
-                session=db,
-                query=user_message,
-                profile_id=profile_id,
-                max_chunks=profile.settings.get("max_context_chunks", 5),
-                similarity_threshold=0.7
-            )
-            
+
             # Generate AI response with streaming
             provider_manager = get_provider_manager()
             
-            # Build context for the prompt
-            context_text = "\n\n".join([
+            # Build context for the prompt — generator form, so join
+            # consumes the formatted pieces without materializing a
+            # throwaway list alongside kilobyte-sized chunks
+            context_text = "\n\n".join(
                 f"Document: {chunk.get('document_filename', 'Unknown')}\nContent: {chunk['content']}"
                 for chunk in context_chunks
-            ])
+            )
             
             # Format prompt with context
             formatted_prompt = profile.prompt.format(
@@ -318,12 +484,39 @@ async def handle_send_message(websocket: WebSocket, session_id: str, user_id: st
                 {
                     "type": "ai_typing",
                     "session_id": session_id,
-                    "timestamp": asyncio.get_event_loop().time()
+                    "timestamp": now()
                 }
             )
             
-            # Stream AI response
+            # Stream AI response. Provider chunks are often only a few
+            # bytes, and every websocket frame pays fixed TCP/WS header
+            # overhead, so chunks are coalesced into one frame per
+            # ~256 bytes or ~20 ms — whichever comes first — instead of
+            # one frame per token.
+            loop = asyncio.get_running_loop()
             ai_response_content = ""
+            pending_chunks = []
+            pending_size = 0
+            last_flush = loop.time()
+
+            session_id_json = orjson.dumps(session_id).decode()
+
+            async def flush_stream_buffer():
+                nonlocal pending_chunks, pending_size, last_flush
+                if not pending_chunks:
+                    return
+                await manager.broadcast_to_session(
+                    session_id,
+                    _AI_STREAMING_TEMPLATE % (
+                        orjson.dumps("".join(pending_chunks)).decode(),
+                        session_id_json,
+                        loop.time()
+                    )
+                )
+                pending_chunks = []
+                pending_size = 0
+                last_flush = loop.time()
+
             async for chunk in provider_manager.stream_response(
                 provider_name=profile.provider,
                 model=profile.model,
@@ -332,17 +525,14 @@ async def handle_send_message(websocket: WebSocket, session_id: str, user_id: st
                 max_tokens=profile.settings.get("max_tokens", 1000)
             ):
                 ai_response_content += chunk
-                
-                # Send streaming chunk to all users in session
-                await manager.broadcast_to_session(
-                    session_id,
-                    {
-                        "type": "ai_streaming",
-                        "chunk": chunk,
-                        "session_id": session_id,
-                        "timestamp": asyncio.get_event_loop().time()
-                    }
-                )
+                pending_chunks.append(chunk)
+                pending_size += len(chunk)
+
+                if pending_size >= _STREAM_FLUSH_BYTES or loop.time() - last_flush >= _STREAM_FLUSH_SECONDS:
+                    await flush_stream_buffer()
+
+            # Flush whatever is left from the tail of the stream
+            await flush_stream_buffer()
             
             # Save complete AI response
             ai_message = await message_repo.create(
@@ -373,15 +563,14 @@ async def handle_send_message(websocket: WebSocket, session_id: str, user_id: st
                 {
                     "type": "error",
                     "message": f"Error processing message: {str(e)}",
-                    "timestamp": asyncio.get_event_loop().time()
+                    "timestamp": now()
                 }
             )
 
 
-async def handle_typing(websocket: WebSocket, session_id: str, user_id: str, message: dict):
+async def handle_typing(websocket: WebSocket, session_id: str, user_id: str, message: TypingMessage):
     """Handle typing indicator."""
-    is_typing = message.get("typing", False)
-    await manager.send_typing_indicator(session_id, user_id, is_typing)
+    await manager.send_typing_indicator(session_id, user_id, message.typing)
 
 
 # Additional WebSocket utilities
@@ -394,7 +583,7 @@ async def notify_session_created(session_id: str, session_name: str, profile_id:
             "session_id": session_id,
             "session_name": session_name,
             "profile_id": profile_id,
-            "timestamp": asyncio.get_event_loop().time()
+            "timestamp": asyncio.get_running_loop().time()
         }
     )
 
@@ -402,13 +591,11 @@ async def notify_session_created(session_id: str, session_name: str, profile_id:
 async def get_active_sessions() -> Dict[str, int]:
     """Get count of active connections per session."""
     return {
-        session_id: len(connections)
-        for session_id, connections in manager.active_connections.items()
+        session_id: len(users)
+        for session_id, users in manager.session_users.items()
     }
 
 
 async def get_session_users(session_id: str) -> Set[str]:
     """Get list of users in a session."""
-    if session_id in manager.active_connections:
-        return set(manager.active_connections[session_id].keys())
-    return set()
+    return set(manager.session_users.get(session_id, ()))
@@ -38,36 +38,34 @@ def health():
 def reset_profile(profile_id):
     """Reset all data for a specific profile."""
     async def reset():
+        from sqlalchemy import text
         from core.database import AsyncSessionLocal
-        from core.db_utils import DocumentRepository, DocumentChunkRepository, ChatSessionRepository
-        
+
         async with AsyncSessionLocal() as session:
-            doc_repo = DocumentRepository(session)
-            chunk_repo = DocumentChunkRepository(session)
-            session_repo = ChatSessionRepository(session)
-            
-            # Delete all data for the profile
-            await session.execute(
-                "DELETE FROM chat_messages WHERE session_id IN "
-                "(SELECT id FROM chat_sessions WHERE profile_id = :profile_id)",
-                {"profile_id": profile_id}
-            )
-            await session.execute(
-                "DELETE FROM chat_sessions WHERE profile_id = :profile_id",
-                {"profile_id": profile_id}
-            )
-            await session.execute(
-                "DELETE FROM document_chunks WHERE profile_id = :profile_id",
-                {"profile_id": profile_id}
-            )
+            # One CTE statement instead of four sequential DELETEs:
+            # a single round-trip, and the planner shares the profile
+            # filter across the deletes
             await session.execute(
-                "DELETE FROM documents WHERE profile_id = :profile_id",
+                text(
+                    "WITH deleted_sessions AS ("
+                    "    DELETE FROM chat_sessions"
+                    "    WHERE profile_id = :profile_id"
+                    "    RETURNING id"
+                    "), deleted_messages AS ("
+                    "    DELETE FROM chat_messages"
+                    "    WHERE session_id IN (SELECT id FROM deleted_sessions)"
+                    "), deleted_chunks AS ("
+                    "    DELETE FROM document_chunks"
+                    "    WHERE profile_id = :profile_id"
+                    ") "
+                    "DELETE FROM documents WHERE profile_id = :profile_id"
+                ),
                 {"profile_id": profile_id}
             )
-            
+
             await session.commit()
             click.echo(f"✅ Reset all data for profile {profile_id}")
-    
+
     asyncio.run(reset())
 
 
@@ -79,19 +77,24 @@ def reset_all():
         return
     
     async def reset():
+        from sqlalchemy import text
         from core.database import AsyncSessionLocal
-        
+
         async with AsyncSessionLocal() as session:
-            # Delete all data
-            await session.execute("DELETE FROM chat_messages")
-            await session.execute("DELETE FROM chat_sessions")
-            await session.execute("DELETE FROM document_chunks")
-            await session.execute("DELETE FROM documents")
-            await session.execute("DELETE FROM profiles")
-            
+            # TRUNCATE is O(1) per table (file unlink) where row-by-row
+            # DELETE scans every table; RESTART IDENTITY also resets
+            # the profile id sequence
+            await session.execute(
+                text(
+                    "TRUNCATE chat_messages, chat_sessions,"
+                    " document_chunks, documents, profiles"
+                    " RESTART IDENTITY CASCADE"
+                )
+            )
+
             await session.commit()
             click.echo("✅ All data deleted")
-    
+
     asyncio.run(reset())
 
 
@@ -2,8 +2,9 @@
 Application settings and configuration.
 """
 import os
+from functools import lru_cache
 from typing import List, Optional
-from pydantic import BaseSettings, Field, validator
+from pydantic import Field, validator
 from pydantic_settings import BaseSettings as PydanticBaseSettings
 
 
@@ -110,18 +111,15 @@ class Settings(PydanticBaseSettings):
         env_file = ".env"
         env_file_encoding = "utf-8"
         case_sensitive = False
+        # Settings are parsed once per process and shared everywhere;
+        # freezing makes that sharing safe and attribute access cheap
+        frozen = True
 
 
-# Global settings instance
-_settings: Optional[Settings] = None
-
-
+@lru_cache(maxsize=1)
 def get_settings() -> Settings:
-    """Get application settings."""
-    global _settings
-    if _settings is None:
-        _settings = Settings()
-    return _settings
+    """Get application settings (cached for the process lifetime)."""
+    return Settings()
 
 
 # Convenience function for dependency injection
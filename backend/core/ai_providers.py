@@ -365,6 +365,26 @@ class CustomProvider(BaseAIProvider):
         super().__init__("custom", config)
         self.base_url = config.get("base_url", "http://localhost:11434/v1")
         self.api_key = os.getenv("CUSTOM_API_KEY")
+
+        # One pooled client for the provider's lifetime: keep-alive
+        # connections avoid paying a TCP+TLS handshake on every call
+        headers = {"Content-Type": "application/json"}
+        if self.api_key:
+            headers["Authorization"] = f"Bearer {self.api_key}"
+        self.client = httpx.AsyncClient(
+            base_url=self.base_url,
+            headers=headers,
+            timeout=30,
+            limits=httpx.Limits(
+                max_connections=100,
+                max_keepalive_connections=20,
+                keepalive_expiry=30.0
+            )
+        )
+
+    async def aclose(self) -> None:
+        """Close the pooled HTTP client."""
+        await self.client.aclose()
     
     async def generate_response(
         self,
@@ -376,35 +396,25 @@ class CustomProvider(BaseAIProvider):
     ) -> AIResponse:
         """Generate response using custom API."""
         try:
-            async with httpx.AsyncClient() as client:
-                headers = {"Content-Type": "application/json"}
-                if self.api_key:
-                    headers["Authorization"] = f"Bearer {self.api_key}"
-                
-                data = {
-                    "model": model,
-                    "messages": [{"role": "user", "content": prompt}],
-                    "temperature": temperature,
-                    "max_tokens": max_tokens,
-                    **kwargs
-                }
-                
-                response = await client.post(
-                    f"{self.base_url}/chat/completions",
-                    headers=headers,
-                    json=data,
-                    timeout=30
-                )
-                response.raise_for_status()
-                result = response.json()
-                
-                return AIResponse(
-                    content=result["choices"][0]["message"]["content"],
-                    model=model,
-                    provider=self.provider_name,
-                    usage=result.get("usage"),
-                    finish_reason=result["choices"][0].get("finish_reason")
-                )
+            data = {
+                "model": model,
+                "messages": [{"role": "user", "content": prompt}],
+                "temperature": temperature,
+                "max_tokens": max_tokens,
+                **kwargs
+            }
+
+            response = await self.client.post("/chat/completions", json=data)
+            response.raise_for_status()
+            result = response.json()
+
+            return AIResponse(
+                content=result["choices"][0]["message"]["content"],
+                model=model,
+                provider=self.provider_name,
+                usage=result.get("usage"),
+                finish_reason=result["choices"][0].get("finish_reason")
+            )
         except Exception as e:
             return AIResponse(
                 content="",
@@ -420,31 +430,21 @@ class CustomProvider(BaseAIProvider):
     ) -> EmbeddingResponse:
         """Generate embeddings using custom API."""
         try:
-            async with httpx.AsyncClient() as client:
-                headers = {"Content-Type": "application/json"}
-                if self.api_key:
-                    headers["Authorization"] = f"Bearer {self.api_key}"
-                
-                data = {
-                    "model": model,
-                    "input": text
-                }
-                
-                response = await client.post(
-                    f"{self.base_url}/embeddings",
-                    headers=headers,
-                    json=data,
-                    timeout=30
-                )
-                response.raise_for_status()
-                result = response.json()
-                
-                return EmbeddingResponse(
-                    embedding=result["data"][0]["embedding"],
-                    model=model,
-                    provider=self.provider_name,
-                    usage=result.get("usage")
-                )
+            data = {
+                "model": model,
+                "input": text
+            }
+
+            response = await self.client.post("/embeddings", json=data)
+            response.raise_for_status()
+            result = response.json()
+
+            return EmbeddingResponse(
+                embedding=result["data"][0]["embedding"],
+                model=model,
+                provider=self.provider_name,
+                usage=result.get("usage")
+            )
         except Exception as e:
             return EmbeddingResponse(
                 embedding=[],
@@ -463,40 +463,33 @@ class CustomProvider(BaseAIProvider):
     ) -> AsyncGenerator[str, None]:
         """Stream response using custom API."""
         try:
-            async with httpx.AsyncClient() as client:
-                headers = {"Content-Type": "application/json"}
-                if self.api_key:
-                    headers["Authorization"] = f"Bearer {self.api_key}"
-                
-                data = {
-                    "model": model,
-                    "messages": [{"role": "user", "content": prompt}],
-                    "temperature": temperature,
-                    "max_tokens": max_tokens,
-                    "stream": True,
-                    **kwargs
-                }
-                
-                async with client.stream(
-                    "POST",
-                    f"{self.base_url}/chat/completions",
-                    headers=headers,
-                    json=data,
-                    timeout=30
-                ) as response:
-                    async for line in response.aiter_lines():
-                        if line.startswith("data: "):
-                            data = line[6:]
-                            if data.strip() == "[DONE]":
-                                break
-                            try:
-                                chunk = json.loads(data)
-                                if "choices" in chunk and chunk["choices"]:
-                                    delta = chunk["choices"][0].get("delta", {})
-                                    if "content" in delta:
-                                        yield delta["content"]
-                            except json.JSONDecodeError:
-                                continue
+            data = {
+                "model": model,
+                "messages": [{"role": "user", "content": prompt}],
+                "temperature": temperature,
+                "max_tokens": max_tokens,
+                "stream": True,
+                **kwargs
+            }
+
+            async with self.client.stream(
+                "POST",
+                "/chat/completions",
+                json=data
+            ) as response:
+                async for line in response.aiter_lines():
+                    if line.startswith("data: "):
+                        data = line[6:]
+                        if data.strip() == "[DONE]":
+                            break
+                        try:
+                            chunk = json.loads(data)
+                            if "choices" in chunk and chunk["choices"]:
+                                delta = chunk["choices"][0].get("delta", {})
+                                if "content" in delta:
+                                    yield delta["content"]
+                        except json.JSONDecodeError:
+                            continue
         except Exception as e:
             yield f"Error: {str(e)}"
 
@@ -508,6 +501,7 @@ class AIProviderManager:
         self.providers: Dict[str, BaseAIProvider] = {}
         self.config = self._load_config()
         self._initialize_providers()
+        self._rebuild_lookup_sets()
     
     def _load_config(self) -> Dict[str, Any]:
         """Load AI provider configuration."""
@@ -535,6 +529,39 @@ class AIProviderManager:
             except Exception as e:
                 print(f"Failed to initialize {provider_name} provider: {e}")
     
+    def _rebuild_lookup_sets(self) -> None:
+        """Precompute frozenset views for O(1) membership checks.
+
+        Validation paths test provider and model names per request;
+        these sets avoid rebuilding a list and scanning it each time.
+        Must be called again if providers are ever re-registered.
+        """
+        self.available_providers_set = frozenset(self.providers)
+        self.available_models_set = {
+            name: frozenset(provider.config.get("models", {}).keys())
+            for name, provider in self.providers.items()
+        }
+        # Full per-provider model-config mapping, built once so the
+        # /config endpoints can hand the dict straight to the
+        # serializer instead of re-walking every model per request
+        self.models_configs = {
+            name: {
+                model: provider.get_model_config(model)
+                for model in provider.config.get("models", {})
+            }
+            for name, provider in self.providers.items()
+        }
+        self.total_models = sum(
+            len(models) for models in self.models_configs.values()
+        )
+
+    async def aclose(self) -> None:
+        """Close any pooled HTTP clients held by providers."""
+        for provider in self.providers.values():
+            close = getattr(provider, "aclose", None)
+            if close is not None:
+                await close()
+
     def get_provider(self, provider_name: str) -> Optional[BaseAIProvider]:
         """Get a provider by name."""
         return self.providers.get(provider_name)
@@ -1,8 +1,12 @@
 """
 Text chunking and preprocessing utilities.
 """
+import multiprocessing
+import os
 import re
+import threading
 import uuid
+from concurrent.futures import ProcessPoolExecutor
 from typing import List, Dict, Any, Optional, Tuple
 from dataclasses import dataclass
 import PyPDF2
@@ -11,8 +15,76 @@ import markdown
 from bs4 import BeautifulSoup
 import logging
 
+# C-backed PDF extractor (Google PDFium); several times faster than
+# PyPDF2's pure-Python parser on text extraction. PyPDF2 stays as the
+# fallback when the wheel is unavailable.
+try:
+    import pypdfium2 as pdfium
+except ImportError:
+    pdfium = None
+
 logger = logging.getLogger(__name__)
 
+# Documents with at least this many pages are extracted across a small
+# process pool; below it the pool round-trip costs more than it saves
+_PDF_PAGE_PARALLEL_THRESHOLD = 8
+
+_PDF_POOL_WORKERS = min(4, os.cpu_count() or 1)
+
+_WORD_RE = re.compile(r'\S+')
+
+
+def _count_words(text: str) -> int:
+    """Count words without materializing the token list.
+
+    len(text.split()) builds every word as its own string object just
+    to take the list's length; on a multi-megabyte transcript that is
+    tens of megabytes of throwaway allocations for one integer.
+    Iterating the matches counts in a single scan with no list.
+    """
+    return sum(1 for _ in _WORD_RE.finditer(text))
+
+_pdf_pool: Optional[ProcessPoolExecutor] = None
+_pdf_pool_lock = threading.Lock()
+
+
+def _get_pdf_pool() -> ProcessPoolExecutor:
+    """Lazily create the shared PDF page-extraction pool.
+
+    Extraction runs from executor threads, so creation is locked to keep
+    concurrent first callers from building (and leaking) a second pool.
+    Workers are spawned rather than forked: forking a live
+    multi-threaded server process is a documented deadlock hazard.
+    """
+    global _pdf_pool
+    with _pdf_pool_lock:
+        if _pdf_pool is None:
+            _pdf_pool = ProcessPoolExecutor(
+                max_workers=_PDF_POOL_WORKERS,
+                mp_context=multiprocessing.get_context("spawn")
+            )
+    return _pdf_pool
+
+
+def _extract_pdfium_page_range(file_path: str, start: int, stop: int) -> List[str]:
+    """Extract text for pages [start, stop); runs in a pool worker.
+
+    Each worker opens its own PDFium handle, so the function stays
+    picklable and workers never share parser state.
+    """
+    doc = pdfium.PdfDocument(file_path)
+    try:
+        texts = []
+        for page_num in range(start, stop):
+            page = doc[page_num]
+            textpage = page.get_textpage()
+            texts.append(textpage.get_text_bounded())
+            textpage.close()
+            page.close()
+        return texts
+    finally:
+        doc.close()
+
 
 @dataclass
 class TextChunk:
@@ -335,10 +407,77 @@ class DocumentProcessor:
         return text, doc_metadata, chunks
     
     def _extract_pdf_text(self, file_path: str) -> Tuple[str, DocumentMetadata]:
-        """Extract text from PDF file."""
+        """Extract text from PDF file.
+
+        Prefers the PDFium-backed extractor when pypdfium2 is
+        installed and falls back to PyPDF2 otherwise.
+        """
+        if pdfium is not None:
+            return self._extract_pdf_text_pdfium(file_path)
+        return self._extract_pdf_text_pypdf2(file_path)
+
+    def _extract_pdf_text_pdfium(self, file_path: str) -> Tuple[str, DocumentMetadata]:
+        """Extract text from PDF file via pypdfium2."""
+        metadata = DocumentMetadata()
+
+        try:
+            doc = pdfium.PdfDocument(file_path)
+            try:
+                # Extract metadata
+                pdf_meta = doc.get_metadata_dict()
+                metadata.title = pdf_meta.get('Title') or None
+                metadata.author = pdf_meta.get('Author') or None
+                metadata.created_date = str(pdf_meta.get('CreationDate', ''))
+                metadata.modified_date = str(pdf_meta.get('ModDate', ''))
+
+                page_count = len(doc)
+                metadata.pages = page_count
+            finally:
+                doc.close()
+
+            # Pages are independent, so large documents fan their
+            # extraction out across a process pool; each worker opens
+            # its own handle for a contiguous page range. Small
+            # documents stay in-process where the pool overhead would
+            # dominate.
+            if page_count >= _PDF_PAGE_PARALLEL_THRESHOLD:
+                pool = _get_pdf_pool()
+                step = -(-page_count // _PDF_POOL_WORKERS)
+                ranges = [
+                    (start, min(start + step, page_count))
+                    for start in range(0, page_count, step)
+                ]
+                extracted = pool.map(
+                    _extract_pdfium_page_range,
+                    [file_path] * len(ranges),
+                    [r[0] for r in ranges],
+                    [r[1] for r in ranges]
+                )
+                raw_texts = [t for batch in extracted for t in batch]
+            else:
+                raw_texts = _extract_pdfium_page_range(file_path, 0, page_count)
+
+            page_texts = []
+            for page_num, page_text in enumerate(raw_texts):
+                if page_text:
+                    page_texts.append(page_text)
+                    metadata.custom_metadata[f'page_{page_num + 1}_text_length'] = len(page_text)
+
+            text = '\n'.join(page_texts)
+            metadata.word_count = _count_words(text)
+            metadata.mime_type = "application/pdf"
+
+        except Exception as e:
+            logger.error(f"Error extracting PDF text: {e}")
+            raise
+
+        return text.strip(), metadata
+
+    def _extract_pdf_text_pypdf2(self, file_path: str) -> Tuple[str, DocumentMetadata]:
+        """Extract text from PDF file via PyPDF2 (fallback)."""
         text = ""
         metadata = DocumentMetadata()
-        
+
         try:
             with open(file_path, 'rb') as file:
                 pdf_reader = PyPDF2.PdfReader(file)
@@ -359,7 +498,7 @@ class DocumentProcessor:
                         text += page_text + '\n'
                         metadata.custom_metadata[f'page_{page_num + 1}_text_length'] = len(page_text)
                 
-                metadata.word_count = len(text.split())
+                metadata.word_count = _count_words(text)
                 metadata.mime_type = "application/pdf"
                 
         except Exception as e:
@@ -395,7 +534,7 @@ class DocumentProcessor:
                         if cell.text.strip():
                             text += cell.text + '\n'
             
-            metadata.word_count = len(text.split())
+            metadata.word_count = _count_words(text)
             metadata.mime_type = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
             
         except Exception as e:
@@ -423,7 +562,7 @@ class DocumentProcessor:
             if first_heading:
                 metadata.title = first_heading.get_text().strip()
             
-            metadata.word_count = len(text.split())
+            metadata.word_count = _count_words(text)
             metadata.mime_type = "text/markdown"
             
         except Exception as e:
@@ -433,22 +572,44 @@ class DocumentProcessor:
         return text.strip(), metadata
     
     def _extract_text_file(self, file_path: str) -> Tuple[str, DocumentMetadata]:
-        """Extract text from plain text file."""
-        text = ""
+        """Extract text from plain text file.
+
+        The file is read from disk exactly once, as bytes; the
+        encoding is picked by BOM sniffing, then strict UTF-8, then a
+        Latin-1 fallback that cannot fail — so a non-UTF-8 upload is
+        degraded instead of rejected, and never re-read.
+        """
         metadata = DocumentMetadata()
-        
+
         try:
-            with open(file_path, 'r', encoding='utf-8') as file:
-                text = file.read()
-            
-            metadata.word_count = len(text.split())
+            with open(file_path, 'rb') as file:
+                raw = file.read()
+
+            text = self._decode_text_bytes(raw)
+
+            metadata.word_count = _count_words(text)
             metadata.mime_type = "text/plain"
-            
+
         except Exception as e:
             logger.error(f"Error extracting text file: {e}")
             raise
-        
+
         return text.strip(), metadata
+
+    @staticmethod
+    def _decode_text_bytes(raw: bytes) -> str:
+        """Decode raw file bytes with BOM sniffing and safe fallback."""
+        for bom, encoding in (
+            (b'\xef\xbb\xbf', 'utf-8-sig'),
+            (b'\xff\xfe', 'utf-16'),
+            (b'\xfe\xff', 'utf-16'),
+        ):
+            if raw.startswith(bom):
+                return raw.decode(encoding)
+        try:
+            return raw.decode('utf-8')
+        except UnicodeDecodeError:
+            return raw.decode('latin-1')
     
     def get_supported_mime_types(self) -> List[str]:
         """Get list of supported MIME types."""
@@ -4,7 +4,7 @@ Database utility functions for common operations.
 import uuid
 from typing import List, Optional, Dict, Any
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, update, delete, func, and_, or_
+from sqlalchemy import select, insert, update, delete, func, and_, or_
 from sqlalchemy.orm import selectinload
 from pgvector.sqlalchemy import l2_distance, cosine_distance
 
@@ -13,7 +13,11 @@ from .models import Profile, Document, DocumentChunk, ChatSession, ChatMessage
 
 class ProfileRepository:
     """Repository for Profile operations."""
-    
+
+    # Repositories are instantiated per request; slots keep that
+    # allocation to a bare minimum (no per-instance __dict__)
+    __slots__ = ("session",)
+
     def __init__(self, session: AsyncSession):
         self.session = session
     
@@ -51,6 +55,22 @@ class ProfileRepository:
         """Get all profiles."""
         result = await self.session.execute(select(Profile))
         return result.scalars().all()
+
+    async def get_page(self, offset: int, limit: int) -> List[Profile]:
+        """Get one page of profiles, paginated in SQL."""
+        result = await self.session.execute(
+            select(Profile)
+            .order_by(Profile.id)
+            .limit(limit)
+            .offset(offset)
+        )
+        return result.scalars().all()
+
+    async def count(self) -> int:
+        """Count all profiles."""
+        return await self.session.scalar(
+            select(func.count()).select_from(Profile)
+        )
     
     async def update(
         self,
@@ -66,6 +86,21 @@ class ProfileRepository:
         await self.session.commit()
         return await self.get_by_id(profile_id)
     
+    async def update_returning(self, profile_id: int, **updates) -> Optional[Profile]:
+        """Update a profile and return the new row, or None if missing.
+
+        One UPDATE ... RETURNING round-trip replaces the get-then-update
+        pair callers otherwise need for 404 detection.
+        """
+        result = await self.session.execute(
+            update(Profile)
+            .where(Profile.id == profile_id)
+            .values(**updates)
+            .returning(Profile)
+        )
+        await self.session.commit()
+        return result.scalar_one_or_none()
+
     async def delete(self, profile_id: int) -> bool:
         """Delete profile."""
         result = await self.session.execute(
@@ -77,7 +112,9 @@ class ProfileRepository:
 
 class DocumentRepository:
     """Repository for Document operations."""
-    
+
+    __slots__ = ("session",)
+
     def __init__(self, session: AsyncSession):
         self.session = session
     
@@ -117,19 +154,28 @@ class DocumentRepository:
     
     async def get_by_profile(
         self,
-        profile_id: int,
+        profile_id: Optional[int],
         limit: int = 50,
         offset: int = 0
     ) -> List[Document]:
-        """Get documents by profile."""
-        result = await self.session.execute(
+        """Get documents by profile, or all documents when profile_id is None."""
+        query = (
             select(Document)
-            .where(Document.profile_id == profile_id)
             .order_by(Document.upload_date.desc())
             .limit(limit)
             .offset(offset)
         )
+        if profile_id is not None:
+            query = query.where(Document.profile_id == profile_id)
+        result = await self.session.execute(query)
         return result.scalars().all()
+
+    async def count_by_profile(self, profile_id: Optional[int]) -> int:
+        """Count documents for a profile, or all documents when None."""
+        query = select(func.count()).select_from(Document)
+        if profile_id is not None:
+            query = query.where(Document.profile_id == profile_id)
+        return await self.session.scalar(query)
     
     async def mark_processed(self, document_id: uuid.UUID) -> bool:
         """Mark document as processed."""
@@ -152,7 +198,9 @@ class DocumentRepository:
 
 class DocumentChunkRepository:
     """Repository for DocumentChunk operations."""
-    
+
+    __slots__ = ("session",)
+
     def __init__(self, session: AsyncSession):
         self.session = session
     
@@ -179,6 +227,19 @@ class DocumentChunkRepository:
         await self.session.refresh(chunk)
         return chunk
     
+    async def bulk_create(self, rows: List[Dict[str, Any]]) -> int:
+        """Insert many chunks in a single executemany round-trip.
+
+        Each row dict uses the DocumentChunk column names. This replaces
+        per-chunk create() calls, which cost one round-trip and commit
+        per chunk.
+        """
+        if not rows:
+            return 0
+        await self.session.execute(insert(DocumentChunk), rows)
+        await self.session.commit()
+        return len(rows)
+
     async def search_similar(
         self,
         profile_id: int,
@@ -233,7 +294,9 @@ class DocumentChunkRepository:
 
 class ChatSessionRepository:
     """Repository for ChatSession operations."""
-    
+
+    __slots__ = ("session",)
+
     def __init__(self, session: AsyncSession):
         self.session = session
     
@@ -266,19 +329,33 @@ class ChatSessionRepository:
     
     async def get_by_profile(
         self,
-        profile_id: int,
+        profile_id: Optional[int],
         limit: int = 50,
         offset: int = 0
     ) -> List[ChatSession]:
-        """Get chat sessions by profile."""
-        result = await self.session.execute(
+        """Get chat sessions by profile, or all sessions when None.
+
+        Messages are eagerly loaded with selectinload so listing a page
+        costs two queries total instead of one per session.
+        """
+        query = (
             select(ChatSession)
-            .where(ChatSession.profile_id == profile_id)
+            .options(selectinload(ChatSession.messages))
             .order_by(ChatSession.updated_at.desc())
             .limit(limit)
             .offset(offset)
         )
+        if profile_id is not None:
+            query = query.where(ChatSession.profile_id == profile_id)
+        result = await self.session.execute(query)
         return result.scalars().all()
+
+    async def count_by_profile(self, profile_id: Optional[int]) -> int:
+        """Count chat sessions for a profile, or all sessions when None."""
+        query = select(func.count()).select_from(ChatSession)
+        if profile_id is not None:
+            query = query.where(ChatSession.profile_id == profile_id)
+        return await self.session.scalar(query)
     
     async def delete(self, session_id: uuid.UUID) -> bool:
         """Delete chat session."""
@@ -291,7 +368,9 @@ class ChatSessionRepository:
 
 class ChatMessageRepository:
     """Repository for ChatMessage operations."""
-    
+
+    __slots__ = ("session",)
+
     def __init__(self, session: AsyncSession):
         self.session = session
     
@@ -313,6 +392,30 @@ class ChatMessageRepository:
         await self.session.commit()
         await self.session.refresh(message)
         return message
+
+    def add(
+        self,
+        session_id: uuid.UUID,
+        role: str,
+        content: str,
+        context_chunks: Optional[List[Dict[str, Any]]] = None
+    ) -> ChatMessage:
+        """Stage a message without committing.
+
+        Lets a handler batch several messages into one transaction and
+        pay a single commit. clock_timestamp() keeps staged messages
+        ordered by insert time, where the column's now() default would
+        stamp everything in the transaction identically.
+        """
+        message = ChatMessage(
+            session_id=session_id,
+            role=role,
+            content=content,
+            context_chunks=context_chunks or [],
+            timestamp=func.clock_timestamp()
+        )
+        self.session.add(message)
+        return message
     
     async def get_by_session(
         self,
@@ -5,8 +5,8 @@ import uuid
 from datetime import datetime
 from typing import List, Optional
 from sqlalchemy import (
-    Column, Integer, String, Text, Boolean, BigInteger, 
-    DateTime, ForeignKey, Index, CheckConstraint
+    Column, Integer, String, Text, Boolean, BigInteger,
+    DateTime, ForeignKey, Index, CheckConstraint, text
 )
 from sqlalchemy.dialects.postgresql import UUID, JSONB
 from sqlalchemy.orm import relationship, Mapped, mapped_column
@@ -16,6 +16,27 @@ from pgvector.sqlalchemy import Vector
 from .database import Base
 
 
+class User(Base):
+    """Application user accounts (optional authentication)."""
+
+    __tablename__ = "users"
+
+    id: Mapped[int] = mapped_column(Integer, primary_key=True, index=True)
+    username: Mapped[str] = mapped_column(String(100), unique=True, nullable=False, index=True)
+    email: Mapped[str] = mapped_column(String(255), unique=True, nullable=False, index=True)
+    hashed_password: Mapped[str] = mapped_column(String(255), nullable=False)
+    is_active: Mapped[bool] = mapped_column(Boolean, default=True, nullable=False)
+    created_at: Mapped[datetime] = mapped_column(
+        DateTime(timezone=True),
+        server_default=func.now(),
+        nullable=False
+    )
+    last_login: Mapped[Optional[datetime]] = mapped_column(DateTime(timezone=True))
+
+    def __repr__(self) -> str:
+        return f"<User(id={self.id}, username='{self.username}')>"
+
+
 class Profile(Base):
     """AI provider profiles and configurations."""
     
@@ -148,8 +169,8 @@ class DocumentChunk(Base):
         Index(
             "idx_document_chunks_embedding",
             "embedding",
-            postgresql_using="ivfflat",
-            postgresql_with={"lists": 100},
+            postgresql_using="hnsw",
+            postgresql_with={"m": 32, "ef_construction": 200},
             postgresql_ops={"embedding": "vector_cosine_ops"}
         ),
         Index("idx_document_chunks_profile_document", "profile_id", "document_id"),
@@ -259,3 +280,21 @@ Index("idx_documents_profile_processed", Document.profile_id, Document.processed
 Index("idx_documents_upload_date", Document.upload_date)
 Index("idx_chat_sessions_profile_updated", ChatSession.profile_id, ChatSession.updated_at)
 Index("idx_chat_messages_role_timestamp", ChatMessage.role, ChatMessage.timestamp)
+
+# Composite index so the popular-models group-by can aggregate over an
+# index scan
+Index("idx_profiles_provider_model", Profile.provider, Profile.model)
+
+# Partial indexes for the analytics scans: user-message counts by time
+# range, recently active sessions, and the unprocessed-documents backlog
+Index(
+    "idx_chat_messages_user_timestamp",
+    ChatMessage.timestamp,
+    postgresql_where=text("role = 'user'")
+)
+Index("idx_chat_sessions_updated_at", ChatSession.updated_at)
+Index(
+    "idx_documents_unprocessed",
+    Document.processed,
+    postgresql_where=text("processed = false")
+)
@@ -0,0 +1,41 @@
+"""
+Short-TTL in-process cache for profile lookups.
+"""
+import time
+from typing import Dict, Optional, Tuple
+
+from .database import AsyncSessionLocal
+from .db_utils import ProfileRepository
+from .models import Profile
+
+# Profiles change rarely but are read on every chat, query and upload;
+# a few seconds of staleness is acceptable in exchange for dropping
+# that round-trip from the hot path.
+PROFILE_CACHE_TTL = 30.0
+
+_cache: Dict[int, Tuple[float, Optional[Profile]]] = {}
+
+
+async def get_cached_profile(profile_id: int) -> Optional[Profile]:
+    """Load a profile by ID through the TTL cache.
+
+    Uses its own session so callers can overlap this lookup with other
+    queries. Misses (profile not found) are cached too, so repeated
+    requests against a deleted profile do not hammer the database.
+    """
+    entry = _cache.get(profile_id)
+    if entry is not None and time.monotonic() - entry[0] < PROFILE_CACHE_TTL:
+        return entry[1]
+
+    async with AsyncSessionLocal() as session:
+        profile = await ProfileRepository(session).get_by_id(profile_id)
+    _cache[profile_id] = (time.monotonic(), profile)
+    return profile
+
+
+def invalidate_profile_cache(profile_id: Optional[int] = None) -> None:
+    """Drop a cached profile, or the whole cache when no ID is given."""
+    if profile_id is None:
+        _cache.clear()
+    else:
+        _cache.pop(profile_id, None)
@@ -5,6 +5,7 @@ import uuid
 from typing import List, Dict, Any, Optional, Tuple
 from dataclasses import dataclass
 import logging
+import numpy as np
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy import select, and_, or_, func, text
 from sqlalchemy.orm import selectinload
@@ -19,6 +20,23 @@ from config.settings import get_settings
 logger = logging.getLogger(__name__)
 
 
+def _batch_cosine_similarities(
+    embeddings: List[List[float]],
+    query_embedding: List[float]
+) -> "np.ndarray":
+    """Cosine similarity of every row against the query in one pass.
+
+    Stacks the chunk embeddings into a matrix so the dot products and
+    norms run as single vectorized operations instead of one Python-
+    level cosine computation per chunk.
+    """
+    matrix = np.asarray(embeddings, dtype=np.float32)
+    query = np.asarray(query_embedding, dtype=np.float32)
+    norms = np.linalg.norm(matrix, axis=1) * np.linalg.norm(query)
+    norms[norms == 0] = 1.0
+    return matrix @ query / norms
+
+
 @dataclass
 class SearchResult:
     """Search result with relevance score."""
@@ -60,11 +78,12 @@ class VectorRetriever:
         profile_id: int,
         limit: int = 10,
         similarity_threshold: float = 0.7,
-        include_metadata: bool = True
+        include_metadata: bool = True,
+        query_embedding: Optional[List[float]] = None
     ) -> SearchResponse:
         """
         Search for similar chunks using vector similarity.
-        
+
         Args:
             session: Database session
             query: Search query text
@@ -72,17 +91,20 @@ class VectorRetriever:
             limit: Maximum number of results
             similarity_threshold: Minimum similarity score
             include_metadata: Whether to include document metadata
-            
+            query_embedding: Pre-computed embedding for the query; when
+                given, skips regenerating it
+
         Returns:
             SearchResponse with results and metadata
         """
         import time
         start_time = time.time()
-        
+
         logger.info(f"Searching for similar chunks: '{query[:50]}...' (profile: {profile_id})")
-        
-        # Generate query embedding
-        query_embedding = await self.embedding_generator.generate_single_embedding(query)
+
+        # Generate query embedding unless the caller already has one
+        if query_embedding is None:
+            query_embedding = await self.embedding_generator.generate_single_embedding(query)
         if not query_embedding:
             logger.error("Failed to generate query embedding")
             return SearchResponse(
@@ -132,10 +154,15 @@ class VectorRetriever:
         query_options = [selectinload(DocumentChunk.document)]
         if include_metadata:
             query_options.append(selectinload(DocumentChunk.profile))
-        
-        # Execute vector similarity search
+
+        # Let the HNSW index serve the top-K directly and return the
+        # distance alongside each row, instead of over-fetching 2x and
+        # recomputing similarity client-side
+        distance = cosine_distance(
+            DocumentChunk.embedding, query_embedding
+        ).label("distance")
         query = (
-            select(DocumentChunk)
+            select(DocumentChunk, distance)
             .options(*query_options)
             .where(
                 and_(
@@ -143,38 +170,36 @@ class VectorRetriever:
                     DocumentChunk.embedding.is_not(None)
                 )
             )
-            .order_by(cosine_distance(DocumentChunk.embedding, query_embedding))
-            .limit(limit * 2)  # Get more results for filtering
+            .order_by(distance)
+            .limit(limit)
         )
-        
+
         result = await session.execute(query)
-        chunks = result.scalars().all()
-        
-        # Calculate similarity scores and filter
+
+        # Filter by threshold using the server-computed distances
         search_results = []
-        for i, chunk in enumerate(chunks):
-            if chunk.embedding:
-                similarity = 1 - cosine_distance(chunk.embedding, query_embedding)
-                
-                if similarity >= similarity_threshold:
-                    metadata = {}
-                    if include_metadata:
-                        metadata = {
-                            "document_filename": chunk.document.filename if chunk.document else None,
-                            "document_id": str(chunk.document.id) if chunk.document else None,
-                            "chunk_index": chunk.chunk_index,
-                            "profile_name": chunk.profile.name if chunk.profile else None
-                        }
-                    
-                    search_results.append(SearchResult(
-                        chunk=chunk,
-                        similarity_score=float(similarity),
-                        rank=len(search_results) + 1,
-                        metadata=metadata
-                    ))
-        
-        # Limit results
-        return search_results[:limit]
+        for chunk, chunk_distance in result.all():
+            similarity = 1.0 - float(chunk_distance)
+            if similarity < similarity_threshold:
+                continue
+
+            metadata = {}
+            if include_metadata:
+                metadata = {
+                    "document_filename": chunk.document.filename if chunk.document else None,
+                    "document_id": str(chunk.document.id) if chunk.document else None,
+                    "chunk_index": chunk.chunk_index,
+                    "profile_name": chunk.profile.name if chunk.profile else None
+                }
+
+            search_results.append(SearchResult(
+                chunk=chunk,
+                similarity_score=similarity,
+                rank=len(search_results) + 1,
+                metadata=metadata
+            ))
+
+        return search_results
     
     async def get_context_chunks(
         self,
@@ -182,18 +207,20 @@ class VectorRetriever:
         query: str,
         profile_id: int,
         max_chunks: int = 5,
-        similarity_threshold: float = 0.7
+        similarity_threshold: float = 0.7,
+        query_embedding: Optional[List[float]] = None
     ) -> List[Dict[str, Any]]:
         """
         Get context chunks for RAG response generation.
-        
+
         Args:
             session: Database session
             query: User query
             profile_id: Profile ID
             max_chunks: Maximum number of context chunks
             similarity_threshold: Minimum similarity threshold
-            
+            query_embedding: Pre-computed embedding for the query
+
         Returns:
             List of context chunk dictionaries
         """
@@ -203,7 +230,8 @@ class VectorRetriever:
             profile_id=profile_id,
             limit=max_chunks,
             similarity_threshold=similarity_threshold,
-            include_metadata=True
+            include_metadata=True,
+            query_embedding=query_embedding
         )
         
         context_chunks = []
@@ -261,22 +289,27 @@ class VectorRetriever:
         result = await session.execute(query_sql)
         chunks = result.scalars().all()
         
-        # Calculate similarity scores
-        search_results = []
-        for i, chunk in enumerate(chunks):
-            if chunk.embedding:
-                similarity = 1 - cosine_distance(chunk.embedding, query_embedding)
-                search_results.append(SearchResult(
-                    chunk=chunk,
-                    similarity_score=float(similarity),
-                    rank=i + 1,
-                    metadata={
-                        "document_filename": chunk.document.filename if chunk.document else None,
-                        "chunk_index": chunk.chunk_index
-                    }
-                ))
-        
-        return search_results
+        # Calculate similarity scores for all chunks in one
+        # vectorized pass
+        scored_chunks = [chunk for chunk in chunks if chunk.embedding is not None]
+        if not scored_chunks:
+            return []
+        similarities = _batch_cosine_similarities(
+            [chunk.embedding for chunk in scored_chunks], query_embedding
+        )
+
+        return [
+            SearchResult(
+                chunk=chunk,
+                similarity_score=float(similarity),
+                rank=i + 1,
+                metadata={
+                    "document_filename": chunk.document.filename if chunk.document else None,
+                    "chunk_index": chunk.chunk_index
+                }
+            )
+            for i, (chunk, similarity) in enumerate(zip(scored_chunks, similarities))
+        ]
     
     async def get_related_chunks(
         self,
@@ -326,22 +359,27 @@ class VectorRetriever:
         result = await session.execute(similar_query)
         chunks = result.scalars().all()
         
-        # Calculate similarity scores
-        search_results = []
-        for i, chunk in enumerate(chunks):
-            if chunk.embedding:
-                similarity = 1 - cosine_distance(chunk.embedding, source_chunk.embedding)
-                search_results.append(SearchResult(
-                    chunk=chunk,
-                    similarity_score=float(similarity),
-                    rank=i + 1,
-                    metadata={
-                        "document_filename": chunk.document.filename if chunk.document else None,
-                        "chunk_index": chunk.chunk_index
-                    }
-                ))
-        
-        return search_results
+        # Calculate similarity scores for all chunks in one
+        # vectorized pass
+        scored_chunks = [chunk for chunk in chunks if chunk.embedding is not None]
+        if not scored_chunks:
+            return []
+        similarities = _batch_cosine_similarities(
+            [chunk.embedding for chunk in scored_chunks], source_chunk.embedding
+        )
+
+        return [
+            SearchResult(
+                chunk=chunk,
+                similarity_score=float(similarity),
+                rank=i + 1,
+                metadata={
+                    "document_filename": chunk.document.filename if chunk.document else None,
+                    "chunk_index": chunk.chunk_index
+                }
+            )
+            for i, (chunk, similarity) in enumerate(zip(scored_chunks, similarities))
+        ]
     
     async def get_profile_statistics(
         self,
@@ -358,16 +396,14 @@ class VectorRetriever:
         Returns:
             Dictionary with statistics
         """
-        # Count total chunks
-        total_chunks_query = (
+        # session.scalar() skips the intermediate Result object each of
+        # these single-value counts would otherwise construct
+        total_chunks = await session.scalar(
             select(func.count(DocumentChunk.id))
             .where(DocumentChunk.profile_id == profile_id)
         )
-        result = await session.execute(total_chunks_query)
-        total_chunks = result.scalar()
-        
-        # Count chunks with embeddings
-        embedded_chunks_query = (
+
+        embedded_chunks = await session.scalar(
             select(func.count(DocumentChunk.id))
             .where(
                 and_(
@@ -376,19 +412,13 @@ class VectorRetriever:
                 )
             )
         )
-        result = await session.execute(embedded_chunks_query)
-        embedded_chunks = result.scalar()
-        
-        # Count documents
-        documents_query = (
+
+        total_documents = await session.scalar(
             select(func.count(Document.id))
             .where(Document.profile_id == profile_id)
         )
-        result = await session.execute(documents_query)
-        total_documents = result.scalar()
-        
-        # Count processed documents
-        processed_docs_query = (
+
+        processed_documents = await session.scalar(
             select(func.count(Document.id))
             .where(
                 and_(
@@ -397,8 +427,6 @@ class VectorRetriever:
                 )
             )
         )
-        result = await session.execute(processed_docs_query)
-        processed_documents = result.scalar()
         
         return {
             "total_chunks": total_chunks,
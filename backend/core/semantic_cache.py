@@ -0,0 +1,136 @@
+"""
+In-memory semantic cache for repeated RAG queries.
+"""
+import time
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+
+def _quantize_unit_vector(embedding: List[float]) -> Optional[np.ndarray]:
+    """Normalize an embedding and scalar-quantize it to int8.
+
+    Unit-normalizing first makes cosine similarity a plain dot product,
+    so the quantized vectors compare with integer arithmetic at a
+    quarter of the fp32 memory footprint.
+    """
+    vector = np.asarray(embedding, dtype=np.float32)
+    norm = np.linalg.norm(vector)
+    if norm == 0.0:
+        return None
+    return np.round(vector / norm * 127.0).astype(np.int8)
+
+
+def _quantized_similarity(a: np.ndarray, b: np.ndarray) -> float:
+    """Cosine similarity between two int8-quantized unit vectors."""
+    return float(np.dot(a.astype(np.int32), b.astype(np.int32))) / (127.0 * 127.0)
+
+
+@dataclass
+class CacheEntry:
+    """Cached retrieval context and model response for one query."""
+    embedding: np.ndarray
+    context_chunks: List[Dict[str, Any]]
+    response: str
+    usage: Optional[Dict[str, int]] = None
+    created_at: float = field(default_factory=time.monotonic)
+
+
+class SemanticCache:
+    """Serve near-identical queries from cache instead of re-running RAG.
+
+    Lookup compares the query embedding against stored entries with
+    cosine similarity; a hit at or above the threshold returns the
+    stored context chunks and model response without touching pgvector
+    or the LLM provider. Entries are scoped per profile so answers
+    never leak between profiles.
+    """
+
+    def __init__(
+        self,
+        similarity_threshold: float = 0.97,
+        ttl_seconds: float = 300.0,
+        max_entries_per_profile: int = 256
+    ):
+        self.similarity_threshold = similarity_threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries_per_profile = max_entries_per_profile
+        self._entries: Dict[int, List[CacheEntry]] = {}
+
+    def check(
+        self,
+        profile_id: int,
+        query_embedding: List[float]
+    ) -> Optional[CacheEntry]:
+        """Return the best cached entry above the similarity threshold."""
+        if not query_embedding:
+            return None
+        quantized = _quantize_unit_vector(query_embedding)
+        if quantized is None:
+            return None
+
+        now = time.monotonic()
+        entries = self._entries.get(profile_id)
+        if not entries:
+            return None
+
+        # Drop expired entries while we are here
+        live = [e for e in entries if now - e.created_at < self.ttl_seconds]
+        if len(live) != len(entries):
+            self._entries[profile_id] = live
+
+        best = None
+        best_similarity = self.similarity_threshold
+        for entry in live:
+            similarity = _quantized_similarity(entry.embedding, quantized)
+            if similarity >= best_similarity:
+                best = entry
+                best_similarity = similarity
+        return best
+
+    def store(
+        self,
+        profile_id: int,
+        query_embedding: List[float],
+        context_chunks: List[Dict[str, Any]],
+        response: str,
+        usage: Optional[Dict[str, int]] = None
+    ) -> None:
+        """Store a completed query's context and response."""
+        if not query_embedding:
+            return
+        quantized = _quantize_unit_vector(query_embedding)
+        if quantized is None:
+            return
+
+        entries = self._entries.setdefault(profile_id, [])
+        entries.append(CacheEntry(
+            embedding=quantized,
+            context_chunks=context_chunks,
+            response=response,
+            usage=usage
+        ))
+        # Evict oldest entries beyond the per-profile cap
+        overflow = len(entries) - self.max_entries_per_profile
+        if overflow > 0:
+            del entries[:overflow]
+
+    def invalidate(self, profile_id: Optional[int] = None) -> None:
+        """Drop cached entries for one profile, or all of them."""
+        if profile_id is None:
+            self._entries.clear()
+        else:
+            self._entries.pop(profile_id, None)
+
+
+# Global semantic cache instance
+_semantic_cache: Optional[SemanticCache] = None
+
+
+def get_semantic_cache() -> SemanticCache:
+    """Get the global semantic cache instance."""
+    global _semantic_cache
+    if _semantic_cache is None:
+        _semantic_cache = SemanticCache()
+    return _semantic_cache
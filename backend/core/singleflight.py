@@ -0,0 +1,52 @@
+"""
+Coalescing of identical concurrent operations into one in-flight call.
+"""
+import asyncio
+from typing import Any, Awaitable, Callable, Dict, Optional
+
+
+class SingleFlight:
+    """Deduplicate concurrent calls that share a key.
+
+    The first caller for a key runs the coroutine function; callers
+    arriving while it is in flight await the same result instead of
+    repeating the work. Keys are forgotten as soon as the call
+    finishes, so this only collapses concurrent duplicates — caching
+    completed results is the semantic cache's job.
+    """
+
+    def __init__(self):
+        self._inflight: Dict[str, asyncio.Future] = {}
+
+    async def do(self, key: str, coro_fn: Callable[[], Awaitable[Any]]) -> Any:
+        """Run coro_fn once per key; concurrent callers share the result."""
+        existing = self._inflight.get(key)
+        if existing is not None:
+            return await asyncio.shield(existing)
+
+        future = asyncio.get_running_loop().create_future()
+        self._inflight[key] = future
+        try:
+            result = await coro_fn()
+        except BaseException as exc:
+            future.set_exception(exc)
+            # Mark retrieved so lone failures do not warn on GC
+            future.exception()
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            self._inflight.pop(key, None)
+
+
+# Global single-flight instance
+_single_flight: Optional[SingleFlight] = None
+
+
+def get_single_flight() -> SingleFlight:
+    """Get the global single-flight instance."""
+    global _single_flight
+    if _single_flight is None:
+        _single_flight = SingleFlight()
+    return _single_flight
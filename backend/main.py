@@ -4,16 +4,21 @@ Main FastAPI application for the RAG system.
 import os
 import logging
 from contextlib import asynccontextmanager
+from pathlib import Path
 from fastapi import FastAPI, HTTPException, Depends
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.middleware.trustedhost import TrustedHostMiddleware
-from fastapi.responses import JSONResponse
+from fastapi.responses import JSONResponse, ORJSONResponse
 from fastapi.staticfiles import StaticFiles
 import uvicorn
 
 from core.database import init_db, close_db, check_db_health
-from api.routes import health, profiles, documents, chat
+from core.ai_providers import get_provider_manager
+from core.embeddings import get_embedding_generator
+from core.retrieval import get_vector_retriever
+from api.routes import health, profiles, documents, chat, analytics, auth
 from api.websocket import chat as ws_chat
+from config.settings import get_settings
 
 
 # Configure logging
@@ -43,12 +48,28 @@ async def lifespan(app: FastAPI):
         logger.error("❌ Database health check failed")
         raise RuntimeError("Database is not accessible")
     
+    # Warm the shared singletons at startup so the first request does not
+    # pay for provider client setup or the embedding model load. The
+    # get_*() factories memoize, so handlers and background tasks all
+    # share these instances.
+    get_provider_manager()
+    get_embedding_generator()
+    app.state.vector_retriever = get_vector_retriever()
+    logger.info("✅ AI providers and retriever initialized")
+
+    # Prime psutil CPU sampling so analytics reads are non-blocking
+    analytics.prime_system_metrics()
+
+    # Create the upload directory once here instead of per upload
+    Path(get_settings().upload_dir).mkdir(parents=True, exist_ok=True)
+
     logger.info("✅ Application startup complete")
     
     yield
     
     # Shutdown
     logger.info("🛑 Shutting down RAG Application...")
+    await get_provider_manager().aclose()
     await close_db()
     logger.info("✅ Application shutdown complete")
 
@@ -60,6 +81,7 @@ app = FastAPI(
     version="1.0.0",
     docs_url="/docs",
     redoc_url="/redoc",
+    default_response_class=ORJSONResponse,
     lifespan=lifespan
 )
 
@@ -111,6 +133,8 @@ app.include_router(health.router, tags=["Health"])
 app.include_router(profiles.router, prefix="/api/v1", tags=["Profiles"])
 app.include_router(documents.router, prefix="/api/v1", tags=["Documents"])
 app.include_router(chat.router, prefix="/api/v1", tags=["Chat"])
+app.include_router(analytics.router, prefix="/api/v1", tags=["Analytics"])
+app.include_router(auth.router, prefix="/api/v1", tags=["Auth"])
 
 # WebSocket endpoint
 app.add_websocket_route("/ws", ws_chat.websocket_endpoint)
@@ -139,5 +163,9 @@ if __name__ == "__main__":
         host="0.0.0.0",
         port=int(os.getenv("BACKEND_PORT", 8000)),
         reload=os.getenv("RELOAD", "false").lower() == "true",
-        log_level=os.getenv("LOG_LEVEL", "info").lower()
+        log_level=os.getenv("LOG_LEVEL", "info").lower(),
+        # uvicorn[standard] ships uvloop and httptools; request them
+        # explicitly rather than relying on "auto" detection
+        loop="uvloop",
+        http="httptools"
     )
@@ -60,7 +60,9 @@ CREATE TABLE chat_messages (
 );
 
 -- Indexes for performance
-CREATE INDEX idx_document_chunks_embedding ON document_chunks USING ivfflat (embedding vector_cosine_ops);
+-- HNSW gives graph-traversal ANN search (O(log N) vs ivfflat's probed
+-- list scans) and needs no training step on empty tables
+CREATE INDEX idx_document_chunks_embedding ON document_chunks USING hnsw (embedding vector_cosine_ops) WITH (m = 32, ef_construction = 200);
 CREATE INDEX idx_document_chunks_profile ON document_chunks(profile_id);
 CREATE INDEX idx_documents_profile ON documents(profile_id);
 CREATE INDEX idx_chat_messages_session ON chat_messages(session_id);
@@ -70,3 +72,35 @@ CREATE INDEX idx_chat_sessions_profile ON chat_sessions(profile_id);
 INSERT INTO profiles (name, description, prompt, provider, model, settings) VALUES
 ('General Assistant', 'General purpose Q&A assistant', 'You are a helpful assistant. Use the following context to answer questions accurately.\n\nContext: {context}\n\nQuestion: {question}\n\nAnswer:', 'openai', 'gpt-4o-mini', '{"max_context_chunks": 5, "chunk_size": 1000, "chunk_overlap": 200}'),
 ('Technical Expert', 'Technical documentation assistant', 'You are a technical expert. Provide detailed, accurate answers based on the documentation context.\n\nContext: {context}\n\nQuestion: {question}\n\nAnswer:', 'anthropic', 'claude-3-sonnet', '{"max_context_chunks": 8, "chunk_size": 1500, "chunk_overlap": 300}');
+
+-- Daily rollup of user messages for the analytics usage endpoint.
+-- Refreshed periodically by the backend so usage queries read a handful
+-- of pre-aggregated rows instead of scanning chat_messages.
+CREATE MATERIALIZED VIEW mv_user_messages_daily AS
+SELECT date_trunc('day', timestamp) AS d, count(*) AS c
+FROM chat_messages
+WHERE role = 'user'
+GROUP BY 1;
+
+-- Unique index required for REFRESH MATERIALIZED VIEW CONCURRENTLY
+CREATE UNIQUE INDEX idx_mv_user_messages_daily_d ON mv_user_messages_daily(d);
+
+-- Indexes for the analytics scans. The partial user-message index turns
+-- the time-range counts into index-only range scans.
+CREATE INDEX idx_chat_messages_user_timestamp ON chat_messages(timestamp) WHERE role = 'user';
+CREATE INDEX idx_chat_sessions_updated_at ON chat_sessions(updated_at);
+CREATE INDEX idx_documents_unprocessed ON documents(processed) WHERE processed = false;
+
+-- Users table (optional authentication)
+CREATE TABLE users (
+    id SERIAL PRIMARY KEY,
+    username VARCHAR(100) UNIQUE NOT NULL,
+    email VARCHAR(255) UNIQUE NOT NULL,
+    hashed_password VARCHAR(255) NOT NULL,
+    is_active BOOLEAN DEFAULT TRUE,
+    created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+    last_login TIMESTAMP
+);
+
+-- Composite index for the popular-models aggregation
+CREATE INDEX idx_profiles_provider_model ON profiles(provider, model);